@@ -1,3 +1,5 @@
-from .reptile import prompt, FORMS_MAP
+from .reptile import FORMS_MAP, Questionnaire, compile, prompt, prompt_async
 
-__all__ = ["FORMS_MAP", "prompt"]
+#  compile is left out of __all__, so that a star import doesn't shadow
+#  the builtin compile().
+__all__ = ["FORMS_MAP", "Questionnaire", "prompt", "prompt_async"]
@@ -0,0 +1,26 @@
+class ReptileError(Exception):
+    """Basic error for Reptile."""
+
+
+class UnnamedQuestion(ReptileError):
+    """Raised when one of the question doesn't have the field Name."""
+
+
+class NotUniqueNames(ReptileError):
+    """Raised when two or more questions share the same name."""
+
+
+class InvalidFormType(ReptileError):
+    """Raised when the question's type is not included in ACCEPTED_TYPES."""
+
+
+class MissingFormType(ReptileError):
+    """Raised when one of the questions is missing the field Type."""
+
+
+class MissingAnswer(ReptileError):
+    """Raised when a preset answer is required but not provided."""
+
+
+class InvalidAnswer(ReptileError):
+    """Raised when a preset answer is not valid for its question."""
@@ -0,0 +1,148 @@
+"""Events emitted while the questions are asked, for timing and tracing.
+
+Hooks registered with add_hook() are called with an Event for each step
+of the life of the forms, in this order:
+
+- FORM_BUILT: the form was created (data: duration, in seconds).
+- FORM_OPENED: the form is about to be asked, before When is checked.
+- FORM_SKIPPED: When said the question shouldn't be asked.
+- FIRST_RENDER: the form was displayed for the first time.
+- RENDERED: a frame was rendered and written (data: duration).
+- KEY_HANDLED: a key was handled (data: duration).
+- VALIDATION_STARTED and VALIDATION_ENDED: Validate was called and its
+  result received (data: valid). Results dropped because the input
+  changed in the meantime have no VALIDATION_ENDED.
+- FORM_CLOSED: the user submitted the form.
+- ANSWER_COMMITTED: Default and Transform were applied to the answer.
+
+PROMPT_STARTED and PROMPT_ENDED surround each run of a Questionnaire
+(i.e. each prompt() call). The time taken by When is therefore included
+between FORM_OPENED and FIRST_RENDER, the time taken by Transform between
+FORM_CLOSED and ANSWER_COMMITTED.
+
+When no hook is registered, emit() returns straight away and the
+Applications aren't watched at all, so the cost is a function call per
+form and step. Hooks are called synchronously, from the thread running
+the form: they should be quick (e.g. append the event to a list).
+"""
+
+import threading
+import time
+import typing as t
+
+FORM_BUILT = "form_built"
+FORM_OPENED = "form_opened"
+FORM_SKIPPED = "form_skipped"
+FIRST_RENDER = "first_render"
+RENDERED = "rendered"
+KEY_HANDLED = "key_handled"
+VALIDATION_STARTED = "validation_started"
+VALIDATION_ENDED = "validation_ended"
+FORM_CLOSED = "form_closed"
+ANSWER_COMMITTED = "answer_committed"
+PROMPT_STARTED = "prompt_started"
+PROMPT_ENDED = "prompt_ended"
+
+
+class Event(t.NamedTuple):
+    """Something that happened while asking the questions.
+
+    The time is a monotonic timestamp (from time.perf_counter()), so only
+    the differences between the times of events are meaningful.
+    """
+
+    name: str
+    #  The Name of the question, None for the events of the whole prompt.
+    form: t.Optional[str]
+    time: float
+    data: dict
+
+
+#  The hooks are replaced rather than modified, so that emit() can iterate
+#  over them while another thread adds or removes one.
+_hooks = ()
+_lock = threading.Lock()
+
+
+def add_hook(hook: t.Callable[[Event], None]) -> t.Callable[[Event], None]:
+    """Registers a function to call with each event.
+
+    The hook is returned, so this can be used as a decorator.
+    """
+    global _hooks
+    with _lock:
+        _hooks = _hooks + (hook,)
+    return hook
+
+
+def remove_hook(hook: t.Callable[[Event], None]) -> None:
+    """Unregisters a function registered with add_hook()."""
+    global _hooks
+    with _lock:
+        hooks = list(_hooks)
+        hooks.remove(hook)
+        _hooks = tuple(hooks)
+
+
+def enabled() -> bool:
+    """Whether any hook is registered."""
+    return bool(_hooks)
+
+
+def emit(name: str, form: t.Optional[str] = None, **data: t.Any) -> None:
+    """Calls the hooks with a new event, if there's any hook."""
+    if not _hooks:
+        return None
+    event = Event(name, form, time.perf_counter(), data)
+    for hook in _hooks:
+        hook(event)
+
+
+class ApplicationWatcher:
+    """Emits the events of a prompt_toolkit Application.
+
+    The renders and the keys handled are timed through the Application's
+    own events. The Application may display several forms one after the
+    other (see Session), hence the form is given as a function returning
+    the Name of the question displayed.
+
+    Args:
+        application: The Application to watch.
+        get_form: Returns the Name of the question currently displayed, if
+            any.
+    """
+
+    def __init__(
+        self, application: t.Any, get_form: t.Callable[[], t.Optional[str]]
+    ) -> None:
+        self._get_form = get_form
+        #  The last form displayed, so FIRST_RENDER is emitted once each.
+        self._displayed = None
+        self._render_start = None
+        self._key_form = None
+        self._key_start = None
+        application.before_render += self._before_render
+        application.after_render += self._after_render
+        application.key_processor.before_key_press += self._before_key
+        application.key_processor.after_key_press += self._after_key
+
+    def _before_render(self, _: t.Any) -> None:
+        self._render_start = time.perf_counter()
+
+    def _after_render(self, _: t.Any) -> None:
+        form = self._get_form()
+        duration = time.perf_counter() - self._render_start
+        emit(RENDERED, form, duration=duration)
+        if form is not None and form != self._displayed:
+            self._displayed = form
+            emit(FIRST_RENDER, form)
+
+    def _before_key(self, _: t.Any) -> None:
+        #  The key may submit the form, so it's attributed to the form
+        #  displayed before it's handled.
+        self._key_form = self._get_form()
+        self._key_start = time.perf_counter()
+
+    def _after_key(self, _: t.Any) -> None:
+        duration = time.perf_counter() - self._key_start
+        emit(KEY_HANDLED, self._key_form, duration=duration)
@@ -1,6 +1,26 @@
-from .checkbox import CheckboxForm
-from .confirm import ConfirmForm
-from .input import InputForm
-from .list import ListForm
+import importlib
+import typing as t
+
+#  Map from each form class to the module defining it. The modules are
+#  only imported when the class is accessed, so that importing a single
+#  form (e.g. reptile.forms.list) doesn't import all the others too.
+_MODULES = {
+    "CheckboxForm": ".checkbox",
+    "ConfirmForm": ".confirm",
+    "InputForm": ".input",
+    "ListForm": ".list",
+}
 
 __all__ = ["CheckboxForm", "ConfirmForm", "InputForm", "ListForm"]
+
+
+def __getattr__(name: str) -> t.Any:
+    if name not in _MODULES:
+        message = "module {!r} has no attribute {!r}".format(__name__, name)
+        raise AttributeError(message)
+    module = importlib.import_module(_MODULES[name], __name__)
+    return getattr(module, name)
+
+
+def __dir__() -> t.List[str]:
+    return sorted(list(globals()) + __all__)
@@ -1,7 +1,68 @@
 import abc
+import asyncio
 import collections
+import inspect
+import threading
+import typing as t
 
+import prompt_toolkit.application as ptk_app
 import prompt_toolkit.key_binding as ptk_key_binding
+import prompt_toolkit.layout.containers as ptk_containers
+
+from .. import events
+from ..errors import InvalidAnswer, MissingAnswer
+from ..style import get_default_style
+from .source import LazyChoices, is_lazy
+
+#  Marks a preset answer as missing, since None may be a valid answer.
+MISSING = object()
+#  prompt_toolkit's default key bindings, shared by the Applications of
+#  each thread (see share_default_bindings()).
+_default_bindings = threading.local()
+
+
+def resolve_sync(value: t.Any) -> t.Any:
+    """Returns a value, awaiting it first if it's awaitable.
+
+    This lets the synchronous code paths accept coroutine functions (e.g.
+    as When or Transform): the coroutine is run in a new event loop.
+    """
+    if not inspect.isawaitable(value):
+        return value
+
+    async def wait() -> t.Any:
+        return await value
+
+    return asyncio.run(wait())
+
+
+def share_default_bindings(
+    application: ptk_app.Application,
+) -> ptk_app.Application:
+    """Makes an Application share prompt_toolkit's default key bindings.
+
+    Every Application builds its own copy of the default key bindings
+    (about 230KB), although they never change. They're replaced by the copy
+    of the first Application created in the same thread, so that the
+    memory is freed: this matters when many Applications are displayed at
+    once (see reptile.server). The copy isn't shared between threads, as
+    the key bindings cache their lookups without locking.
+
+    Returns:
+        The Application itself.
+    """
+    bindings = getattr(_default_bindings, "value", None)
+    if bindings is None:
+        bindings = (
+            application._default_bindings,
+            application._page_navigation_bindings,
+        )
+        _default_bindings.value = bindings
+    (
+        application._default_bindings,
+        application._page_navigation_bindings,
+    ) = bindings
+    return application
 
 
 class AbstractForm(abc.ABC):
@@ -19,13 +80,18 @@ class AbstractForm(abc.ABC):
                 mandatory.
             - Choices: An array-like structure of values to display to
                 the user. Only relevant for list-like forms such as ListForm.
-                Optional for certain forms and required for others.
+                Optional for certain forms and required for others. It can
+                also be an iterator, a generator or an async iterator, in
+                which case the choices are loaded while the form is already
+                displayed (see LazyChoices).
             - Values: An array-like structure with the same lenght as Choices.
                 If specified (it's entirely optional), it provides
                 backend values for Choices. If the user select the second
                 value in Choices within the form, then the final
                 dictionary will store the second element of Values. If
                 Values is not specified, then Choices is used instead.
+                When Choices is lazy, Values must still be indexable but its
+                length is not checked.
             - Validate: A function to use to validate the data. These
                 function can return True (valid), False (invalid with
                 generic message) or a str (invalid, the string is used
@@ -40,6 +106,11 @@ class AbstractForm(abc.ABC):
                 False. If True, the question is asked, if False skipped.
                 This is useful if you want to have a series of questions
                 with some of them being conditional.
+            - Style: A prompt_toolkit Style for the classes listed in
+                reptile.style. Defaults to the shared default style.
+            When, Validate and Transform can also be coroutine functions.
+            With ask_question_async() they're awaited without blocking the
+            event loop.
     """
 
     def __init__(self, **kwargs: dict) -> None:
@@ -47,14 +118,18 @@ class AbstractForm(abc.ABC):
         self._name = k["Name"]
         self._message = k["Message"]
         self._choices = k["Choices"]
+        if is_lazy(self._choices):
+            self._choices = LazyChoices(self._choices)
         self._validate = k["Validate"]
         self._transform = k["Transform"]
         self._when = k["When"]
-        self._style = k["Style"]
+        #  The default style is shared by all the forms, rather than being
+        #  built (and compiled by prompt_toolkit) once per question.
+        self._style = k["Style"] or get_default_style()
         #  If no Values are passed, self._values default to Choices
         #  if Choices is actually available.
-        self._values = k["Values"] if k["Values"] else k["Choices"]
-        if self._values:
+        self._values = k["Values"] if k["Values"] else self._choices
+        if self._values and not isinstance(self._choices, LazyChoices):
             assert len(self._values) == len(self._choices)
         if "Default" in k:
             #  If Default is not defined, then self._default is not
@@ -62,6 +137,12 @@ class AbstractForm(abc.ABC):
             #  user may want to specify None as a default value and we want
             #  to be able to respect that.
             self._default = k["Default"]
+        #  Called instead of exiting the Application when the form is
+        #  displayed by a Session (see _submit()).
+        self._on_submit = None
+        #  Static parts of the form, such as fragments, built on first use
+        #  (see _use_cache()).
+        self._cache = {}
         self._generate_key_bindings()
 
     def _generate_key_bindings(self) -> None:
@@ -72,6 +153,65 @@ class AbstractForm(abc.ABC):
         """
         self._key_bindings = ptk_key_binding.KeyBindings()
 
+    def _use_cache(self, cache: dict) -> None:
+        """Shares the static parts of the form with other forms.
+
+        A Questionnaire creates a new form every time a question is asked,
+        and passes the same cache to all the forms for the same question,
+        so that what doesn't depend on the state of the form is only built
+        once. Forms may run in different threads: the values in the cache
+        are replaced rather than modified once they're stored.
+        """
+        self._cache = cache
+
+    def _submit(
+        self, application: ptk_app.Application, result: t.Any = None
+    ) -> None:
+        """Completes the form, handing over the result of the interaction.
+
+        Usually the form runs its own Application, which is simply exited.
+        When the form is displayed by a Session the Application is shared
+        with the other forms instead, so the Session is notified.
+        """
+        if self._on_submit:
+            self._on_submit(result)
+        else:
+            application.exit(result=result)
+
+    def _start(self, application: ptk_app.Application) -> None:
+        """Called once the form's own Application is running.
+
+        The Application is watched if any hook is registered (see events),
+        then _pre_run() is called.
+        """
+        if events.enabled():
+            events.ApplicationWatcher(application, lambda: self._name)
+        self._pre_run(application)
+
+    def _pre_run(self, application: ptk_app.Application) -> None:
+        """Hook called once the Application displaying the form is running.
+
+        Children classes can override it to start background tasks.
+        """
+        pass
+
+    @abc.abstractmethod
+    def _create_container(self) -> ptk_containers.Container:
+        """Creates the container with all the windows for the form.
+
+        The container is used by Session to display the form, so it must
+        work with the form's key bindings without any other setup.
+        """
+        pass
+
+    def _get_answer(self, result: t.Any) -> t.Any:
+        """Returns the answer given the result of the interaction."""
+        return result
+
+    def _get_result_text(self, result: t.Any) -> str:
+        """Returns the answer as text, as displayed once it's submitted."""
+        return str(result)
+
     @abc.abstractmethod
     def _ask_question(self, answers: dict) -> None:
         """Asks the question and stores the answer in the dict.
@@ -84,6 +224,18 @@ class AbstractForm(abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    async def _ask_question_async(self, answers: dict) -> None:
+        """Asks the question and stores the answer in the dict.
+
+        This is the asynchronous version of _ask_question() and, likewise,
+        it has to be overridden by the child class.
+
+        Args:
+            answers: the dict where to store the answers.
+        """
+        pass
+
     def ask_question(self, answers: dict) -> None:
         """Asks the question and stores the answer in the dict.
 
@@ -95,9 +247,110 @@ class AbstractForm(abc.ABC):
         Args:
             answers: the dict where to store the answers.
         """
-        if not self._when or self._when(answers):
+        events.emit(events.FORM_OPENED, self._name)
+        if resolve_sync(self._should_ask(answers)):
             self._ask_question(answers)
-            if not answers[self._name] and hasattr(self, "_default"):
-                answers[self._name] = self._default
-            if self._transform:
-                answers[self._name] = self._transform(answers[self._name])
+            events.emit(events.FORM_CLOSED, self._name)
+            resolve_sync(self._commit_answer(answers))
+            events.emit(events.ANSWER_COMMITTED, self._name)
+        else:
+            events.emit(events.FORM_SKIPPED, self._name)
+
+    async def ask_question_async(self, answers: dict) -> None:
+        """Asks the question and stores the answer in the dict.
+
+        Same as ask_question(), but the form runs on the current event loop
+        instead of blocking it, and When and Transform are awaited if they
+        are coroutine functions.
+
+        Args:
+            answers: the dict where to store the answers.
+        """
+        events.emit(events.FORM_OPENED, self._name)
+        should_ask = self._should_ask(answers)
+        if inspect.isawaitable(should_ask):
+            should_ask = await should_ask
+        if should_ask:
+            await self._ask_question_async(answers)
+            events.emit(events.FORM_CLOSED, self._name)
+            committed = self._commit_answer(answers)
+            if committed is not None:
+                await committed
+            events.emit(events.ANSWER_COMMITTED, self._name)
+        else:
+            events.emit(events.FORM_SKIPPED, self._name)
+
+    def answer_from_preset(
+        self, answers: dict, preset: t.Mapping, strict: bool = False
+    ) -> None:
+        """Answers the question with a preset answer, without prompting.
+
+        Everything else works as in ask_question(): When, Default and
+        Transform are applied and the preset answer is checked (e.g. with
+        Validate) as if the user had entered it. No Application is ever
+        created, so this doesn't need a terminal.
+
+        Args:
+            answers: the dict where to store the answers.
+            preset: A mapping from the questions' names to the answers, as
+                they would be typed or selected by the user.
+            strict: If True, a missing answer raises MissingAnswer. If
+                False, it's treated as the user just pressing Enter.
+
+        Raises:
+            MissingAnswer: If the answer is missing and strict is True.
+            InvalidAnswer: If the preset answer is not valid.
+        """
+        if resolve_sync(self._should_ask(answers)):
+            if self._name in preset:
+                raw = preset[self._name]
+            elif strict:
+                message = "Missing answer for {}.".format(self._name)
+                raise MissingAnswer(message)
+            else:
+                raw = MISSING
+            answers[self._name] = self._parse_preset(raw)
+            resolve_sync(self._commit_answer(answers))
+
+    def _parse_preset(self, raw: t.Any) -> t.Any:
+        """Turns a preset answer into the answer the form would return.
+
+        Children classes should override this to map choices to Values,
+        run Validate, etc. The raw answer is MISSING if not provided.
+        """
+        return None if raw is MISSING else raw
+
+    def _invalid_answer(self, message: str) -> InvalidAnswer:
+        """Returns an InvalidAnswer mentioning the question's name."""
+        return InvalidAnswer("{}: {}".format(self._name, message))
+
+    def _should_ask(
+        self, answers: dict
+    ) -> t.Union[bool, t.Awaitable[bool]]:
+        """Checks the When, i.e. whether the question has to be asked.
+
+        If When is a coroutine function, the awaitable it returns is
+        returned as is: it's up to the caller to await it.
+        """
+        return not self._when or self._when(answers)
+
+    def _commit_answer(self, answers: dict) -> t.Optional[t.Awaitable]:
+        """Applies the Default and the Transform to the answer.
+
+        If Transform is a coroutine function, an awaitable that stores the
+        transformed answer is returned: it's up to the caller to await it.
+        """
+        if not answers[self._name] and hasattr(self, "_default"):
+            answers[self._name] = self._default
+        if self._transform:
+            transformed = self._transform(answers[self._name])
+            if inspect.isawaitable(transformed):
+                return self._store_transformed(answers, transformed)
+            answers[self._name] = transformed
+        return None
+
+    async def _store_transformed(
+        self, answers: dict, transformed: t.Awaitable
+    ) -> None:
+        """Stores the answer returned by an asynchronous Transform."""
+        answers[self._name] = await transformed
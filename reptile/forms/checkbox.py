@@ -1,12 +1,19 @@
+import inspect
+import typing as t
+
 import prompt_toolkit.application as ptk_app
-import prompt_toolkit.formatted_text as ptk_formatted_text
+import prompt_toolkit.filters as ptk_filters
 import prompt_toolkit.layout.containers as ptk_containers
 import prompt_toolkit.layout.controls as ptk_controls
-import prompt_toolkit.layout.layout as ptk_layout
-
-from pygments.token import Token as T
 
+from .. import events, style
+from .abstract import MISSING, resolve_sync
 from .multi import MultiForm
+from .selection import Selection
+from .validation import run_validate
+
+SELECTED = (style.SELECTOR, "● ")
+UNSELECTED = (style.SELECTOR, "○ ")
 
 
 class CheckboxForm(MultiForm):
@@ -14,64 +21,155 @@ class CheckboxForm(MultiForm):
 
     This form is different from ListForm in that the user can select
     multiple options. As such, the answer is stored as a list().
+
+    The selected choices are stored in a Selection, a bitset from which
+    the selectors are derived when rendering: selecting all the choices,
+    inverting the selection and clearing it take constant time, and the
+    selected choices come out in order without sorting.
+
+    Args:
+        kwargs: On top of the fields accepted by MultiForm:
+            - ValidateInThread: If True, Validate is run in a worker
+                thread, so that a slow validation doesn't freeze the form.
     """
 
     def __init__(self, **kwargs: dict) -> None:
         super(CheckboxForm, self).__init__(**kwargs)
-        self._selected = set()
+        self._selected = Selection()
+        #  The message displayed when Validate fails, if any.
+        self._error_message = None
+        self._validate_in_thread = bool(kwargs.get("ValidateInThread"))
+        #  The pending validation, when Validate doesn't run in the UI.
+        self._validation_task = None
         self._add_key_bindings()
 
     def _add_key_bindings(self) -> None:
         """Adds keys to self.__key_bindings for list movements."""
+        #  While filtering, <a> and <i> are part of the query.
+        filtering = ptk_filters.Condition(lambda: self._filtering)
 
         @self._key_bindings.add("enter")
         def enter(event: object) -> None:
-            self._selection = [self._values[s] for s in sorted(self._selected)]
-            validation = (
-                self._validate(self._selection) if self._validate else True
-            )
-            if validation is True:
-                event.app.exit()
+            self._selection = [
+                self._values[idx] for idx in self._get_selected_indices()
+            ]
+            if self._validation_task is not None:
+                self._validation_task.cancel()
+                self._validation_task = None
+            if not self._validate:
+                self._submit(event.app)
+                return None
+            events.emit(events.VALIDATION_STARTED, self._name)
+            if self._validate_in_thread:
+                validation = run_validate(
+                    self._validate, self._selection, in_thread=True
+                )
+            else:
+                validation = self._validate(self._selection)
+            if inspect.isawaitable(validation):
+                self._validation_task = event.app.create_background_task(
+                    self._await_validation(
+                        event.app, validation, self._selected.version
+                    )
+                )
             else:
-                message = "Could not validate the input succesfully."
-                if isinstance(validation, str):
-                    message = validation
-                self._display_error(message)
+                self._handle_validation(event.app, validation)
 
         @self._key_bindings.add("space")
         def click(event: object) -> None:
-            if self._idx_cursor not in self._selected:
-                self._selected.add(self._idx_cursor)
-                self._select(self._choices_windows[self._idx_cursor])
-            else:
-                self._selected.remove(self._idx_cursor)
-                self._deselect(self._choices_windows[self._idx_cursor])
+            idx = self._get_cursor_choice()
+            if idx is not None:
+                self._selected.toggle(idx)
+
+        @self._key_bindings.add("s-up")
+        def select_up(event: object) -> None:
+            self._select_range(-1)
+
+        @self._key_bindings.add("s-down")
+        def select_down(event: object) -> None:
+            self._select_range(1)
 
-        @self._key_bindings.add("a")
+        @self._key_bindings.add("a", filter=~filtering)
         def select_all(event: object) -> None:
-            for idx in range(len(self._choices_windows)):
-                self._selected.add(idx)
-                self._select(self._choices_windows[idx])
+            #  If everything is selected already, <a> selects nothing.
+            if self._selected.is_all():
+                self._selected.clear()
+            else:
+                self._selected.select_all()
 
-        @self._key_bindings.add("i")
+        @self._key_bindings.add("i", filter=~filtering)
         def invert_all(event: object) -> None:
-            for idx in range(len(self._choices_windows)):
-                if idx not in self._selected:
-                    self._selected.add(idx)
-                    self._select(self._choices_windows[idx])
-                else:
-                    self._selected.remove(idx)
-                    self._deselect(self._choices_windows[idx])
-
-    def _select(self, window: ptk_containers.Window) -> None:
-        """Marks a given choice as selected."""
-        token = (T.Selector, "● ")
-        window.content.text.token_list[1] = token
-
-    def _deselect(self, window: ptk_containers.Window) -> None:
-        """Marks a given choice as deselected."""
-        token = (T.Selector, "○ ")
-        window.content.text.token_list[1] = token
+            self._selected.invert()
+
+    def _select_range(self, step: int) -> None:
+        """Selects the choice under the cursor and moves it, selecting more.
+
+        Holding <shift> while moving up or down thus selects a range of
+        choices (in the current view, when filtering).
+        """
+        idx = self._get_cursor_choice()
+        if idx is None:
+            return None
+        self._selected.add(idx)
+        self._move_cursor_to(self._idx_cursor + step)
+        self._selected.add(self._get_cursor_choice())
+
+    def _get_selected_indices(self) -> t.Iterator[int]:
+        """Yields the indices of the selected choices, in order."""
+        return self._selected.indices(len(self._choices))
+
+    def _get_choice_state(self, idx: int) -> bool:
+        """Returns whether the choice at a given index is selected."""
+        return idx in self._selected
+
+    def _create_choice_fragments(self, idx: int, is_cursor: bool) -> list:
+        """Creates the fragments for a choice, including its selector."""
+        fragments = super(CheckboxForm, self)._create_choice_fragments(
+            idx, is_cursor
+        )
+        fragments.insert(1, SELECTED if idx in self._selected else UNSELECTED)
+        return fragments
+
+    def _handle_validation(
+        self,
+        application: ptk_app.Application,
+        validation: t.Union[bool, str],
+    ) -> None:
+        """Submits the form if validated, displays an error otherwise."""
+        message = self._get_error_message(validation)
+        valid = message is None
+        events.emit(events.VALIDATION_ENDED, self._name, valid=valid)
+        if message is None:
+            self._submit(application)
+        else:
+            self._display_error(message)
+
+    def _get_error_message(
+        self, validation: t.Union[bool, str]
+    ) -> t.Optional[str]:
+        """Returns the error message if Validate failed, None otherwise."""
+        if validation is True:
+            return None
+        if isinstance(validation, str):
+            return validation
+        return "Could not validate the input succesfully."
+
+    async def _await_validation(
+        self,
+        application: ptk_app.Application,
+        validation: t.Awaitable[t.Union[bool, str]],
+        version: int,
+    ) -> None:
+        """Waits for an asynchronous Validate without blocking the UI.
+
+        If the selection changes in the meantime, the result is dropped:
+        the user has to press <enter> again anyway.
+        """
+        validation = await validation
+        self._validation_task = None
+        if self._selected.version == version:
+            self._handle_validation(application, validation)
+            application.invalidate()
 
     def _display_error(self, message: str) -> None:
         """Displays an error message in a dedicated Window.
@@ -81,41 +179,67 @@ class CheckboxForm(MultiForm):
         Args:
             message: The message to display the user.
         """
-        token = (T.Error, message)
-        self._error_window.content.text.token_list[0] = token
-        self._error_window.height = 1
-
-    def _generate_error_window(self):
-        """Generates an empty error Window for later use."""
-        #  Note that because the height is 0 by default, this window
-        #  will not be visible unless the height is changed.
-        empty_tokens = [(T.Error, "")]
-        empty_fragments = ptk_formatted_text.PygmentsTokens(empty_tokens)
-        empty_text = ptk_controls.FormattedTextControl(
-            empty_fragments, show_cursor=False
+        self._error_message = message
+
+    def _get_error_fragments(self) -> list:
+        """Returns the fragments for the error message, if there's one."""
+        return [(style.ERROR, self._error_message or "")]
+
+    def _generate_error_window(self) -> ptk_containers.Window:
+        """Generates the error Window, only visible once there's an error."""
+        error_text = ptk_controls.FormattedTextControl(
+            self._get_error_fragments, show_cursor=False
+        )
+        return ptk_containers.Window(
+            error_text, height=lambda: 1 if self._error_message else 0
         )
-        return ptk_containers.Window(empty_text, height=0)
 
-    def _ask_question(self, answers: dict) -> None:
-        """Asks a question and store the answer in the answers dict."""
+    def _create_container(self) -> ptk_containers.Container:
+        """Creates the container with the question, choices and errors."""
         instructions = (
             "(<up>, <down> to move, <space> to select, "
-            "<a> to select all, <i> to invert all)"
+            "<a> to select all, <i> to invert all, </> to filter)"
         )
         self._question_window = self._generate_question_window(instructions)
-        self._choices_windows = self._generate_choices_windows("Checkbox")
+        self._choices_window = self._generate_choices_window()
         self._error_window = self._generate_error_window()
-        windows = (
-            [self._question_window]
-            + self._choices_windows
-            + [self._error_window]
+        return ptk_containers.HSplit(
+            [
+                self._question_window,
+                self._choices_window,
+                self._error_window,
+            ]
         )
-        body = ptk_containers.HSplit(windows)
-        application = ptk_app.Application(
-            layout=ptk_layout.Layout(body),
-            key_bindings=self._key_bindings,
-            full_screen=False,
-            style=self._style,
+
+    def _get_answer(self, result: t.Any) -> t.Any:
+        """Returns the values of the selected choices."""
+        return self._selection
+
+    def _get_result_text(self, result: t.Any) -> str:
+        """Returns the selected choices, separated by commas."""
+        return ", ".join(
+            str(self._choices[idx]) for idx in self._get_selected_indices()
         )
-        application.run()
-        answers[self._name] = self._selection
+
+    def _parse_preset(self, raw: t.Any) -> t.Any:
+        """Returns the values of the preset choices, after validation.
+
+        The choices can be given as a list or as a comma-separated string
+        (e.g. when coming from an environment variable).
+        """
+        if raw is MISSING:
+            raw = []
+        elif isinstance(raw, str):
+            raw = [c.strip() for c in raw.split(",") if c.strip()]
+        selected = Selection()
+        for choice in raw:
+            selected.add(self._get_position(choice))
+        selection = [
+            self._values[idx] for idx in selected.indices(len(self._choices))
+        ]
+        if self._validate:
+            validation = resolve_sync(self._validate(selection))
+            message = self._get_error_message(validation)
+            if message is not None:
+                raise self._invalid_answer(message)
+        return selection
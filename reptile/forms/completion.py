@@ -0,0 +1,171 @@
+import array
+import itertools
+import os
+import sys
+import threading
+import typing as t
+
+import prompt_toolkit.completion as ptk_completion
+import prompt_toolkit.document as ptk_document
+
+#  Maximum number of completions offered at once.
+MAX_COMPLETIONS = 50
+#  Completions are ranked (see VocabularyIndex.complete()) only when the
+#  prefix matches at most this many words, so that ranking stays cheap.
+RANK_LIMIT = 1000
+
+
+class VocabularyIndex:
+    """Sorted-array index over a vocabulary, for prefix completion.
+
+    The words are sorted case-insensitively and stored back to back in a
+    single string, separated by newlines, with an array of 4-byte offsets
+    pointing at the start of each word. Finding the words starting with a
+    prefix is then two binary searches, i.e. about 2 * log2(n) string
+    comparisons (40 for a million words).
+
+    Compared with a list of strings (~50 bytes of overhead per word) or a
+    trie (a dict per node), the index takes little more than the text of
+    the words themselves: for 10^6 words of 15 characters on average, about
+    16MB for the words and 4MB for the offsets. If some words aren't
+    lowercase, their original spelling takes the same space once more.
+    See memory_size().
+
+    Args:
+        words: The words of the vocabulary. Duplicates, empty words and
+            words spanning multiple lines are dropped.
+    """
+
+    def __init__(self, words: t.Iterable[str]) -> None:
+        unique = {word for word in words if word and "\n" not in word}
+        ordered = sorted(unique, key=str.lower)
+        del unique
+        keys = [word.lower() for word in ordered]
+        self._keys, self._key_offsets = self._pack(keys)
+        if keys == ordered:
+            self._words, self._word_offsets = self._keys, self._key_offsets
+        else:
+            self._words, self._word_offsets = self._pack(ordered)
+
+    @staticmethod
+    def _pack(words: t.List[str]) -> t.Tuple[str, array.array]:
+        """Joins the words in a single string, returning it and offsets."""
+        offsets = array.array("I", [0])
+        offsets.extend(itertools.accumulate(len(word) + 1 for word in words))
+        return "\n".join(words) + "\n", offsets
+
+    @classmethod
+    def from_file(cls, path: t.Union[str, os.PathLike]) -> "VocabularyIndex":
+        """Builds the index from a text file with one word per line."""
+        with open(path, "r") as fh:
+            return cls(line.strip() for line in fh)
+
+    def __len__(self) -> int:
+        return len(self._key_offsets) - 1
+
+    def _get_key(self, idx: int) -> str:
+        """Returns the lowercased word at a given position."""
+        offsets = self._key_offsets
+        return self._keys[offsets[idx] : offsets[idx + 1] - 1]
+
+    def _get_word(self, idx: int) -> str:
+        """Returns the word at a given position."""
+        offsets = self._word_offsets
+        return self._words[offsets[idx] : offsets[idx + 1] - 1]
+
+    def _find_range(self, prefix: str) -> t.Tuple[int, int]:
+        """Returns the range of positions of the words starting with prefix."""
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_key(middle) < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        start, high = low, len(self)
+        size = len(prefix)
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_key(middle)[:size] == prefix:
+                low = middle + 1
+            else:
+                high = middle
+        return start, low
+
+    def complete(
+        self, prefix: str, limit: int = MAX_COMPLETIONS
+    ) -> t.List[str]:
+        """Returns the words starting with a prefix, best first.
+
+        The match is case-insensitive. When the prefix matches no more than
+        RANK_LIMIT words, shorter words (i.e. the closest completions) come
+        first; otherwise the words are simply in alphabetical order.
+
+        Args:
+            prefix: The text to complete.
+            limit: The maximum number of words to return.
+        """
+        start, end = self._find_range(prefix.lower())
+        if end - start > RANK_LIMIT:
+            return [self._get_word(idx) for idx in range(start, start + limit)]
+        offsets = self._key_offsets
+        lengths = [
+            following - offset
+            for offset, following in zip(
+                offsets[start:end], offsets[start + 1 : end + 1]
+            )
+        ]
+        ranked = sorted(range(end - start), key=lengths.__getitem__)
+        return [self._get_word(start + idx) for idx in ranked[:limit]]
+
+    def memory_size(self) -> int:
+        """Returns the number of bytes taken by the index."""
+        size = sys.getsizeof(self._keys) + sys.getsizeof(self._key_offsets)
+        if self._words is not self._keys:
+            size += sys.getsizeof(self._words)
+            size += sys.getsizeof(self._word_offsets)
+        return size
+
+
+class VocabularyCompleter(ptk_completion.Completer):
+    """Completes the word before the cursor with words from a vocabulary.
+
+    The index is built on the first completion, rather than when the form
+    is created: InputForm wraps the completer in a ThreadedCompleter, so
+    the building (as any completion) happens in a worker thread and never
+    freezes the form.
+
+    Args:
+        vocabulary: Either the words or the path to a text file with one
+            word per line.
+    """
+
+    def __init__(
+        self, vocabulary: t.Union[t.Iterable[str], str, os.PathLike]
+    ) -> None:
+        self._vocabulary = vocabulary
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> VocabularyIndex:
+        """The index over the vocabulary, built on first access."""
+        with self._lock:
+            if self._index is None:
+                if isinstance(self._vocabulary, (str, os.PathLike)):
+                    self._index = VocabularyIndex.from_file(self._vocabulary)
+                else:
+                    self._index = VocabularyIndex(self._vocabulary)
+                self._vocabulary = None
+            return self._index
+
+    def get_completions(
+        self,
+        document: ptk_document.Document,
+        complete_event: ptk_completion.CompleteEvent,
+    ) -> t.Iterator[ptk_completion.Completion]:
+        prefix = document.get_word_before_cursor(WORD=True)
+        if not prefix:
+            return None
+        for word in self.index.complete(prefix):
+            yield ptk_completion.Completion(word, start_position=-len(prefix))
@@ -1,10 +1,16 @@
-import prompt_toolkit as ptk
-import prompt_toolkit.formatted_text as ptk_formatted_text
+import typing as t
+
+import prompt_toolkit.application as ptk_app
 import prompt_toolkit.keys as ptk_keys
-from pygments.token import Token as T
 
+from .. import style
+from .abstract import MISSING
 from .input import InputForm
 
+#  Preset answers accepted as Yes and No (lowercased).
+YES_ANSWERS = frozenset(["y", "yes", "true", "1"])
+NO_ANSWERS = frozenset(["n", "no", "false", "0"])
+
 
 class ConfirmForm(InputForm):
     """A form where the user is asked to confirm with a Yes/No question.
@@ -25,29 +31,52 @@ class ConfirmForm(InputForm):
         @self._key_bindings.add("Y")
         def yes(event) -> None:
             event.current_buffer.text = "y"
-            event.app.exit(result=True)
+            self._submit(event.app, True)
 
         @self._key_bindings.add("n")
         @self._key_bindings.add("N")
         def no(event) -> None:
             event.current_buffer.text = "n"
-            event.app.exit(result=False)
+            self._submit(event.app, False)
 
         @self._key_bindings.add(ptk_keys.Keys.Any)
         def _(event) -> None:
             """Disallows inserting other text."""
             pass
 
-    def _format_message(self) -> ptk_formatted_text.PygmentsTokens:
+    def _format_message(self) -> list:
         message_fragments = super(ConfirmForm, self)._format_message()
-        instructions_tokens = [(T.Instruction, "(y/n) ")]
-        message_fragments.token_list += instructions_tokens
+        message_fragments.append((style.INSTRUCTION, "(y/n) "))
         return message_fragments
 
-    def _ask_question(self, answers: dict) -> None:
-        answers[self._name] = ptk.prompt(
-            self._format_message(),
-            style=self._style,
-            validate_while_typing=False,
-            key_bindings=self._key_bindings,
-        )
+    def _get_result_text(self, result: t.Any) -> str:
+        """Returns y/n as typed by the user."""
+        return {True: "y", False: "n"}.get(result, "")
+
+    def _parse_preset(self, raw: t.Any) -> t.Any:
+        """Returns True or False for the preset answer.
+
+        Besides booleans, strings such as y/n, yes/no and true/false are
+        accepted. A missing answer is treated like pressing Enter.
+        """
+        if raw is MISSING or raw == "":
+            return ""
+        if isinstance(raw, bool):
+            return raw
+        answer = str(raw).strip().lower()
+        if answer in YES_ANSWERS:
+            return True
+        if answer in NO_ANSWERS:
+            return False
+        message = "{!r} is not a yes/no answer.".format(raw)
+        raise self._invalid_answer(message)
+
+    def _get_prompt_kwargs(self) -> dict:
+        """Returns the arguments for prompt_toolkit's prompt()."""
+        return {
+            "message": self._format_message(),
+            "style": self._style,
+            "validate_while_typing": False,
+            "key_bindings": self._key_bindings,
+            "pre_run": lambda: self._start(ptk_app.get_app()),
+        }
@@ -1,12 +1,29 @@
+import asyncio
+import inspect
 import typing as t
 
 import prompt_toolkit as ptk
+import prompt_toolkit.application as ptk_app
+import prompt_toolkit.buffer as ptk_buffer
+import prompt_toolkit.completion as ptk_completion
 import prompt_toolkit.document as ptk_document
-import prompt_toolkit.formatted_text as ptk_formatted_text
+import prompt_toolkit.layout.containers as ptk_containers
+import prompt_toolkit.layout.controls as ptk_controls
+import prompt_toolkit.layout.menus as ptk_menus
 import prompt_toolkit.validation as ptk_validation
-from pygments.token import Token as T
 
-from .abstract import AbstractForm
+from .. import events, style
+from .abstract import (
+    MISSING,
+    AbstractForm,
+    resolve_sync,
+    share_default_bindings,
+)
+from .completion import VocabularyCompleter
+from .validation import VALIDATION_DELAY, ResultsCache, run_validate
+
+#  Number of lines taken by the menu of completions.
+COMPLETIONS_HEIGHT = 8
 
 
 class InputValidator(ptk_validation.Validator):
@@ -20,56 +37,328 @@ class InputValidator(ptk_validation.Validator):
     the validation fails (if str, then the string is used as the
     message to display to the user).
 
+    The results are remembered (see ResultsCache), so the same text is not
+    validated twice. Failures are checked again when the user submits,
+    though, in case the validation depends on something that the user
+    may have fixed in the meantime (e.g. a missing file).
+
     Args:
         function: The function to use for validation.
+        in_thread: If True, the function is run in a worker thread, so
+            that a slow validation doesn't freeze the form.
+        name: The Name of the question, for the events emitted.
     """
 
-    def __init__(self, function: t.Callable[[str], t.Union[bool, str]]):
+    def __init__(
+        self,
+        function: t.Callable[[str], t.Union[bool, str]],
+        in_thread: bool = False,
+        name: t.Optional[str] = None,
+    ):
         self._function = function
+        self._in_thread = in_thread
+        self._name = name
+        #  Coroutine functions can't be awaited by validate(), nor should
+        #  threaded ones be run by it: their result is computed by
+        #  validate_async() and remembered.
+        self.is_async = in_thread or inspect.iscoroutinefunction(function)
+        self._results = ResultsCache()
 
-    def validate(self, document: ptk_document.Document) -> None:
-        """Validates the content inputted by the user."""
-        validation = self._function(document.text)
-        cursor_position = len(document.text)
-
+    @staticmethod
+    def get_error_message(validation: t.Union[bool, str]) -> str:
+        """Returns the error message if the validation failed, "" if not."""
         message = ""
         if not validation:
             message = "The input was not validated succesfully."
         if isinstance(validation, str):
             message = validation
+        return message
+
+    def get_cached_message(self, text: str) -> t.Optional[str]:
+        """Returns the error message for a text already validated, if any."""
+        return self._results.get(text)
+
+    def get_message(self, text: str) -> str:
+        """Validates a text synchronously and returns the error message."""
+        events.emit(events.VALIDATION_STARTED, self._name)
+        message = self.get_error_message(self._function(text))
+        events.emit(events.VALIDATION_ENDED, self._name, valid=not message)
+        self._results.put(text, message)
+        return message
+
+    async def get_message_async(self, text: str) -> str:
+        """Validates a text without blocking and returns the error message."""
+        events.emit(events.VALIDATION_STARTED, self._name)
+        validation = await run_validate(self._function, text, self._in_thread)
+        message = self.get_error_message(validation)
+        events.emit(events.VALIDATION_ENDED, self._name, valid=not message)
+        self._results.put(text, message)
+        return message
+
+    def _check(self, message: str, document: ptk_document.Document) -> None:
+        """Raises a ValidationError if there's an error message."""
+        cursor_position = len(document.text)
         if message:
             raise ptk_validation.ValidationError(
                 message=message, cursor_position=cursor_position
             )
 
+    def validate(self, document: ptk_document.Document) -> None:
+        """Validates the content inputted by the user."""
+        message = self._results.get(document.text)
+        if message is None and self.is_async:
+            message = "The input has not been validated yet."
+        elif message != "" and not self.is_async:
+            #  Not validated yet, or failed and worth checking again.
+            message = self.get_message(document.text)
+        self._check(message, document)
+
+    async def validate_async(self, document: ptk_document.Document) -> None:
+        """Validates the content inputted by the user, awaiting if needed."""
+        message = self._results.get(document.text)
+        if message is None or message:
+            message = await self.get_message_async(document.text)
+        self._check(message, document)
+
 
 class InputForm(AbstractForm):
     """Class for forms of type Input.
 
     InputForms are forms where the user is asked to type some input
     following a question, e.g. [?] What's your name?
+
+    Args:
+        kwargs: On top of the fields accepted by AbstractForm:
+            - ValidateInThread: If True, Validate is run in a worker
+                thread rather than in the UI thread. Useful when it's slow,
+                e.g. because it checks the filesystem or the network.
+            - ValidateWhileTyping: If True, the input is validated as the
+                user types, as soon as they stop for VALIDATION_DELAY
+                seconds, and the error is displayed straight away.
+            - Vocabulary: The words to complete the input with, either
+                as an iterable or as the path to a text file with one word
+                per line (see VocabularyCompleter). The completions are
+                computed in a worker thread while the user types.
     """
 
     def __init__(self, **kwargs: dict) -> None:
         super(InputForm, self).__init__(**kwargs)
         if self._validate:
-            self._validator = InputValidator(self._validate)
+            self._validator = InputValidator(
+                self._validate,
+                in_thread=bool(kwargs.get("ValidateInThread")),
+                name=self._name,
+            )
         else:
             self._validator = None
+        self._validate_while_typing = bool(kwargs.get("ValidateWhileTyping"))
+        #  The pending validation while typing, if any.
+        self._validation_task = None
+        self._vocabulary = kwargs.get("Vocabulary")
+        if self._validator and self._validator.is_async:
+            self._add_validation_key_bindings()
+
+    def _add_validation_key_bindings(self) -> None:
+        """Adds keys to self.__key_bindings for asynchronous validation."""
+
+        @self._key_bindings.add("enter")
+        def enter(event: object) -> None:
+            event.app.create_background_task(
+                self._validate_and_accept(event.app, event.current_buffer)
+            )
+
+    async def _validate_and_accept(
+        self, application: ptk_app.Application, buffer: ptk_buffer.Buffer
+    ) -> None:
+        """Awaits the validation, then accepts the input if it's valid.
+
+        The event loop keeps running while the validation is pending. If
+        the user changes the input in the meantime, the result is dropped.
+        """
+        document = buffer.document
+        try:
+            await self._validator.validate_async(document)
+        except ptk_validation.ValidationError as error:
+            if buffer.text == document.text:
+                buffer.validation_error = error
+                application.invalidate()
+            return None
+        if buffer.text == document.text:
+            buffer.validate_and_handle()
+
+    def _show_validation(
+        self, buffer: ptk_buffer.Buffer, message: str
+    ) -> None:
+        """Displays the error message of a validation (if it failed)."""
+        if message:
+            buffer.validation_error = ptk_validation.ValidationError(
+                message=message, cursor_position=len(buffer.text)
+            )
+        else:
+            buffer.validation_error = None
+        ptk_app.get_app().invalidate()
+
+    async def _validate_typed_text(
+        self, buffer: ptk_buffer.Buffer, text: str
+    ) -> None:
+        """Validates a text once the user stops typing for a while."""
+        await asyncio.sleep(VALIDATION_DELAY)
+        if self._validator.is_async:
+            message = await self._validator.get_message_async(text)
+        else:
+            message = self._validator.get_message(text)
+        if buffer.text == text:
+            self._show_validation(buffer, message)
 
-    def _format_message(self) -> ptk_formatted_text.PygmentsTokens:
+    def _on_text_changed(self, buffer: ptk_buffer.Buffer) -> None:
+        """Schedules the validation of the new text, cancelling the last.
+
+        Texts validated already (e.g. when the user deletes a character
+        and types it again) are not validated again.
+        """
+        if self._validation_task is not None:
+            self._validation_task.cancel()
+            self._validation_task = None
+        message = self._validator.get_cached_message(buffer.text)
+        if message is not None:
+            self._show_validation(buffer, message)
+        else:
+            self._validation_task = ptk_app.get_app().create_background_task(
+                self._validate_typed_text(buffer, buffer.text)
+            )
+
+    def _pre_run(self, application: ptk_app.Application) -> None:
+        """Starts validating while typing, if needed."""
+        if self._validator and self._validate_while_typing:
+            application.current_buffer.on_text_changed += (
+                self._on_text_changed
+            )
+
+    def _format_message(self) -> list:
         """Formats the message provided by the user to improve readability."""
-        message_tokens = [
-            (T.QuestionMark, "[?] "),
-            (T.Question, self._message + " "),
+        return [
+            (style.QUESTION_MARK, "[?] "),
+            (style.QUESTION, self._message + " "),
         ]
-        message_fragments = ptk_formatted_text.PygmentsTokens(message_tokens)
-        return message_fragments
 
-    def _ask_question(self, answers: dict) -> None:
-        answers[self._name] = ptk.prompt(
-            self._format_message(),
-            style=self._style,
+    def _get_error_fragments(self) -> list:
+        """Returns the fragments for the validation error, if there's one."""
+        error = self._buffer.validation_error
+        message = error.message if error else ""
+        return [(style.ERROR, message)]
+
+    def _accept(self, buffer: ptk_buffer.Buffer) -> bool:
+        """Submits the (validated) text when the user presses Enter."""
+        self._submit(ptk_app.get_app(), buffer.text)
+        #  The text is kept, so that it remains on screen.
+        return True
+
+    def _get_completer(self) -> t.Optional[ptk_completion.Completer]:
+        """Returns the completer for the Vocabulary, if there's one.
+
+        The completer (and so its index) is kept in the cache, so that it's
+        built only once for all the forms created by a Questionnaire.
+        """
+        if self._vocabulary is None:
+            return None
+        completer = self._cache.get("completer")
+        if completer is None:
+            completer = ptk_completion.ThreadedCompleter(
+                VocabularyCompleter(self._vocabulary)
+            )
+            self._cache["completer"] = completer
+        return completer
+
+    def _create_container(self) -> ptk_containers.Container:
+        """Creates the container with the message and an input buffer.
+
+        This is only used when the form is displayed by a Session: on its
+        own, the form relies on prompt_toolkit's prompt() instead.
+        """
+        completer = self._get_completer()
+        self._buffer = ptk_buffer.Buffer(
+            completer=completer,
+            complete_while_typing=completer is not None,
             validator=self._validator,
             validate_while_typing=False,
+            accept_handler=self._accept,
+            multiline=False,
+        )
+        message_text = ptk_controls.FormattedTextControl(
+            self._format_message(), show_cursor=False
+        )
+        message_window = ptk_containers.Window(
+            message_text, dont_extend_width=True
+        )
+        input_window = ptk_containers.Window(
+            ptk_controls.BufferControl(self._buffer)
+        )
+        error_text = ptk_controls.FormattedTextControl(
+            self._get_error_fragments, show_cursor=False
+        )
+        #  The error window is only visible when the validation fails.
+        error_window = ptk_containers.Window(
+            error_text,
+            height=lambda: 1 if self._buffer.validation_error else 0,
+        )
+        #  Room for the menu of completions, only while there's one.
+        completions_window = ptk_containers.Window(
+            height=lambda: (
+                COMPLETIONS_HEIGHT if self._buffer.complete_state else 0
+            )
+        )
+        return ptk_containers.FloatContainer(
+            ptk_containers.HSplit(
+                [
+                    ptk_containers.VSplit([message_window, input_window]),
+                    error_window,
+                    completions_window,
+                ]
+            ),
+            floats=[
+                ptk_containers.Float(
+                    xcursor=True,
+                    ycursor=True,
+                    content=ptk_menus.CompletionsMenu(
+                        max_height=COMPLETIONS_HEIGHT
+                    ),
+                )
+            ],
+        )
+
+    def _parse_preset(self, raw: t.Any) -> t.Any:
+        """Returns the preset text, after validation."""
+        text = "" if raw is MISSING else str(raw)
+        if self._validate:
+            validation = resolve_sync(self._validate(text))
+            message = InputValidator.get_error_message(validation)
+            if message:
+                raise self._invalid_answer(message)
+        return text
+
+    def _get_prompt_kwargs(self) -> dict:
+        """Returns the arguments for prompt_toolkit's prompt()."""
+        return {
+            "message": self._format_message(),
+            "style": self._style,
+            "validator": self._validator,
+            #  Validation while typing is handled by the form itself (see
+            #  _pre_run()), so that it can be debounced and cancelled.
+            "validate_while_typing": False,
+            "completer": self._get_completer(),
+            "complete_while_typing": True,
+            "key_bindings": self._key_bindings,
+            "pre_run": lambda: self._start(ptk_app.get_app()),
+        }
+
+    def _ask_question(self, answers: dict) -> None:
+        answers[self._name] = ptk.prompt(**self._get_prompt_kwargs())
+
+    async def _ask_question_async(self, answers: dict) -> None:
+        session = ptk.PromptSession()
+        #  Many sessions may be asked at once on the same loop (see
+        #  reptile.server), so they share the default key bindings.
+        share_default_bindings(session.app)
+        answers[self._name] = await session.prompt_async(
+            **self._get_prompt_kwargs()
         )
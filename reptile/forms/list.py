@@ -1,7 +1,8 @@
-import prompt_toolkit.application as ptk_app
+import typing as t
+
 import prompt_toolkit.layout.containers as ptk_containers
-import prompt_toolkit.layout.layout as ptk_layout
 
+from .abstract import MISSING
 from .multi import MultiForm
 
 
@@ -27,20 +28,33 @@ class ListForm(MultiForm):
 
         @self._key_bindings.add("enter")
         def enter(event: object) -> None:
-            event.app.exit()
-
-    def _ask_question(self, answers: dict) -> None:
-        """Asks a question and store the answer in the answers dict."""
-        instructions = "(Use arrow keys)"
+            #  If the filter doesn't match any choice there's
+            #  nothing to select.
+            if self._get_cursor_choice() is not None:
+                self._submit(event.app)
+
+    def _create_container(self) -> ptk_containers.Container:
+        """Creates the container with the question and the choices."""
+        instructions = "(Use arrow keys, </> to filter)"
         self._question_window = self._generate_question_window(instructions)
-        self._choices_windows = self._generate_choices_windows("List")
-        windows = [self._question_window] + self._choices_windows
-        body = ptk_containers.HSplit(windows)
-        application = ptk_app.Application(
-            layout=ptk_layout.Layout(body),
-            key_bindings=self._key_bindings,
-            full_screen=False,
-            style=self._style,
+        self._choices_window = self._generate_choices_window()
+        return ptk_containers.HSplit(
+            [self._question_window, self._choices_window]
         )
-        application.run()
-        answers[self._name] = self._values[self._idx_cursor]
+
+    def _get_answer(self, result: t.Any) -> t.Any:
+        """Returns the value of the choice under the cursor."""
+        return self._values[self._get_cursor_choice()]
+
+    def _get_result_text(self, result: t.Any) -> str:
+        """Returns the choice under the cursor."""
+        return str(self._choices[self._get_cursor_choice()])
+
+    def _parse_preset(self, raw: t.Any) -> t.Any:
+        """Returns the value of the preset choice.
+
+        A missing answer selects the first choice, as pressing Enter would.
+        """
+        if raw is MISSING:
+            return self._values[0]
+        return self._values[self._get_position(raw)]
@@ -1,12 +1,27 @@
 import typing as t
 
 import prompt_toolkit.application as ptk_app
-import prompt_toolkit.formatted_text as ptk_formatted_text
+import prompt_toolkit.filters as ptk_filters
+import prompt_toolkit.keys as ptk_keys
 import prompt_toolkit.layout.containers as ptk_containers
 import prompt_toolkit.layout.controls as ptk_controls
-from pygments.token import Token as T
+import prompt_toolkit.layout.layout as ptk_layout
 
-from .abstract import AbstractForm
+from .. import style
+from .abstract import AbstractForm, share_default_bindings
+from .search import ChoicesIndex
+from .source import LazyChoices
+
+#  Number of choices displayed at once when the question doesn't specify
+#  a PageSize. The other choices are reached by scrolling.
+DEFAULT_PAGE_SIZE = 10
+#  Maximum number of rows whose fragments are cached. Only the rows in the
+#  viewport are ever rendered, so the cache is simply emptied when full.
+ROW_CACHE_SIZE = 1024
+#  Fragments shared by all the rows.
+NEWLINE = (style.TEXT, "\n")
+CURSOR_POINTER = (style.POINTER, "❯ ")
+EMPTY_POINTER = (style.POINTER, "  ")
 
 
 class MultiForm(AbstractForm):
@@ -15,13 +30,47 @@ class MultiForm(AbstractForm):
     Both ListForm and CheckboxForm are children of this class. This parent
     class implements a few comodity functions such as vertical movements
     for the cursor.
+
+    The choices are rendered by a single virtualized Window: only the
+    slice of Choices currently in the viewport (PageSize rows around the
+    cursor) is ever turned into text, so the cost of building and
+    redrawing the form doesn't depend on the number of Choices. When some
+    of the choices are out of the viewport, an extra line reports how many
+    of them are hidden above and below. The same line says when lazy
+    Choices are still being loaded in the background.
+
+    The fragments of each row are built once per state of the row (see
+    _get_choice_state()) and cached, so a keystroke moving the cursor or
+    selecting a choice only swaps rows that are already built.
+
+    Pressing </> enters the filter mode: from then on, the characters typed
+    by the user narrow down the choices to the ones matching the query
+    (see ChoicesIndex) and <escape> goes back to the full list. While
+    filtering, self._idx_cursor is a position in self._view, the ranked
+    list of matching choices, rather than an index of Choices.
+
+    Args:
+        kwargs: On top of the fields accepted by AbstractForm:
+            - PageSize: The maximum number of choices to display at once.
+                Defaults to DEFAULT_PAGE_SIZE.
     """
 
-    #  Parent class for Checkbox and Listform.
+    #  Parent class for Checkbox and Listform.
     def __init__(self, **kwargs: dict) -> None:
         super(MultiForm, self).__init__(**kwargs)
         self._idx_cursor = 0
+        #  Index of the first choice visible in the viewport.
+        self._idx_top = 0
+        self._page_size = kwargs.get("PageSize") or DEFAULT_PAGE_SIZE
+        self._instructions = ""
+        #  The filter state. The index is only built when the user
+        #  starts filtering, so that constructing the form stays cheap.
+        self._filtering = False
+        self._query = ""
+        self._view = None
+        self._index = None
         self._add_cursor_key_bindings()
+        self._add_filter_key_bindings()
 
     def _add_cursor_key_bindings(self) -> None:
         """Adds keys to self.__key_bindings for up/down movements."""
@@ -34,83 +83,304 @@ class MultiForm(AbstractForm):
         def move_cursor_down(event: object) -> None:
             self._move_cursor_down(event.app)
 
-    def _unset_cursor(self, window: ptk_containers.Window) -> None:
-        """Removes the cursor pointer from a given window."""
-        token = (T.Pointer, "  ")
-        window.content.text.token_list[0] = token
+        @self._key_bindings.add("pageup")
+        def move_page_up(event: object) -> None:
+            self._move_cursor_to(self._idx_cursor - self._page_size)
 
-    def _set_cursor(self, window: ptk_containers.Window) -> None:
-        """Adds the cursor pointer to a given window."""
-        token = (T.Pointer, "❯ ")
-        window.content.text.token_list[0] = token
+        @self._key_bindings.add("pagedown")
+        def move_page_down(event: object) -> None:
+            self._move_cursor_to(self._idx_cursor + self._page_size)
 
-    def _move_cursor_up(self, application: ptk_app.Application) -> None:
-        """Moves the cursor from one window to the one above.
+        @self._key_bindings.add("home")
+        def move_cursor_first(event: object) -> None:
+            self._move_cursor_to(0)
+
+        @self._key_bindings.add("end")
+        def move_cursor_last(event: object) -> None:
+            self._move_cursor_to(self._get_view_size() - 1)
+
+    def _add_filter_key_bindings(self) -> None:
+        """Adds keys to self.__key_bindings for filtering the choices."""
+        filtering = ptk_filters.Condition(lambda: self._filtering)
+
+        @self._key_bindings.add("/", filter=~filtering)
+        def start_filtering(event: object) -> None:
+            self._filtering = True
+
+        @self._key_bindings.add(ptk_keys.Keys.Any, filter=filtering)
+        def type_query(event: object) -> None:
+            #  Spaces are left to the form (e.g. CheckboxForm uses them
+            #  to select), while control sequences are simply ignored.
+            if event.data.isprintable() and event.data != " ":
+                self._set_query(self._query + event.data)
+
+        @self._key_bindings.add("backspace", filter=filtering)
+        def delete_query(event: object) -> None:
+            self._set_query(self._query[:-1])
+
+        @self._key_bindings.add("escape", filter=filtering)
+        def stop_filtering(event: object) -> None:
+            self._stop_filtering()
+
+    def _get_view_size(self) -> int:
+        """Returns the number of choices the cursor can move through."""
+        if self._view is None:
+            return len(self._choices)
+        return len(self._view)
+
+    def _get_choice_idx(self, position: int) -> int:
+        """Returns the index in Choices of a given position in the view."""
+        if self._view is None:
+            return position
+        return self._view[position]
 
-        The cursor is removed from the "active" window (self._idx_cursor
-        is used to keep track of which window is active) and added to
-        the one above it.
+    def _get_cursor_choice(self) -> t.Optional[int]:
+        """Returns the index in Choices under the cursor, if there's one."""
+        if self._idx_cursor >= self._get_view_size():
+            return None
+        return self._get_choice_idx(self._idx_cursor)
+
+    def _set_query(self, query: str) -> None:
+        """Filters the choices with a new query and resets the cursor."""
+        self._query = query
+        if query:
+            if self._index is None:
+                lowered = self._cache.get("lowered")
+                self._index = ChoicesIndex(self._choices, lowered)
+            self._view = self._index.search(query)
+            self._cache["lowered"] = self._index.lowered
+        else:
+            self._view = None
+        self._idx_cursor = 0
+        self._idx_top = 0
+
+    def _stop_filtering(self) -> None:
+        """Goes back to the full list, keeping the cursor on its choice."""
+        choice = self._get_cursor_choice()
+        self._filtering = False
+        self._query = ""
+        self._view = None
+        self._idx_top = 0
+        self._move_cursor_to(choice if choice is not None else 0)
+
+    def _get_position(self, choice: t.Any) -> int:
+        """Returns the index of a choice given as a preset answer.
+
+        Raises:
+            InvalidAnswer: If the choice is not one of Choices.
+        """
+        #  Map from each choice to its index, built on first use.
+        positions = self._cache.get("positions")
+        if positions is None:
+            if isinstance(self._choices, LazyChoices):
+                self._choices.load_all()
+            positions = {}
+            for idx, item in enumerate(self._choices):
+                positions.setdefault(item, idx)
+            self._cache["positions"] = positions
+        try:
+            return positions[choice]
+        except (KeyError, TypeError):
+            message = "{!r} is not one of the choices.".format(choice)
+            raise self._invalid_answer(message) from None
+
+    def _move_cursor_to(self, idx: int) -> None:
+        """Moves the cursor to a given choice, scrolling if needed.
+
+        The index is clamped to the range of the available choices, and
+        the viewport is scrolled just enough to keep the cursor visible.
         """
-        #  If the cursor is already at first position, then
-        #  we don't do anything and simply return None.
+        max_idx = self._get_view_size() - 1
+        self._idx_cursor = max(0, min(idx, max_idx))
+        if self._idx_cursor < self._idx_top:
+            self._idx_top = self._idx_cursor
+        elif self._idx_cursor >= self._idx_top + self._page_size:
+            self._idx_top = self._idx_cursor - self._page_size + 1
+
+    def _move_cursor_up(self, application: ptk_app.Application) -> None:
+        """Moves the cursor from one choice to the one above."""
+        #  If the cursor is already at first position, then
+        #  we don't do anything and simply return None.
         if self._idx_cursor == 0:
             return None
-        self._unset_cursor(self._choices_windows[self._idx_cursor])
-        self._set_cursor(self._choices_windows[self._idx_cursor - 1])
-        self._idx_cursor -= 1
+        self._move_cursor_to(self._idx_cursor - 1)
 
     def _move_cursor_down(self, application: ptk_app.Application) -> None:
-        """Moves the cursor from one window to the one below.
-
-        The cursor is removed from the "active" window (self._idx_cursor
-        is used to keep track of which window is active) and added to
-        the one below it.
-        """
-        #  If the cursor is already at last position, then
-        #  we don't do anything and simply return None.
-        max_idx = len(self._choices) - 1
-        if self._idx_cursor == max_idx:
+        """Moves the cursor from one choice to the one below."""
+        #  If the cursor is already at last position, then
+        #  we don't do anything and simply return None.
+        max_idx = self._get_view_size() - 1
+        if self._idx_cursor >= max_idx:
             return None
-        self._unset_cursor(self._choices_windows[self._idx_cursor])
-        self._set_cursor(self._choices_windows[self._idx_cursor + 1])
-        self._idx_cursor += 1
+        self._move_cursor_to(self._idx_cursor + 1)
+
+    def _get_question_fragments(self) -> list:
+        """Returns the fragments for the question, instructions or query."""
+        question = self._cache.get("question")
+        if question is None:
+            question = [
+                (style.QUESTION_MARK, "[?] "),
+                (style.QUESTION, self._message),
+            ]
+            self._cache["question"] = question
+        if self._filtering:
+            return question + [
+                (style.INSTRUCTION, " /"),
+                (style.TEXT, self._query),
+            ]
+        return question + [(style.INSTRUCTION, " " + self._instructions)]
 
     def _generate_question_window(
         self, instructions: str
     ) -> ptk_containers.Window:
         """Generates a Window for the question and instructions."""
-        question_tokens = [
-            (T.QuestionMark, "[?] "),
-            (T.Question, self._message),
-            (T.Instruction, " {}".format(instructions)),
-        ]
-        question_fragments = ptk_formatted_text.PygmentsTokens(question_tokens)
+        self._instructions = instructions
         question_text = ptk_controls.FormattedTextControl(
-            question_fragments, show_cursor=False
+            self._get_question_fragments, show_cursor=False
         )
         return ptk_containers.Window(question_text, height=1)
 
-    def _generate_choices_windows(
-        self, form_type: str
-    ) -> t.List[ptk_containers.Window]:
-        """Generates a list of Windows for the various Choices."""
-        assert form_type in ("List", "Checkbox")
-        tokens_groups = []
-        #  First, each choice is transformed into a Pygments' Token. These
-        #  tokens are not supported natively in prompt_toolkit anymore, so
-        #  they need to be transformed via PygmentsTokens().
-        for idx, choice in enumerate(self._choices):
-            tokens = [(T.Pointer, "❯ ")] if idx == 0 else [(T.Pointer, "  ")]
-            if form_type == "Checkbox":
-                tokens.append((T.Selector, "○ "))
-            tokens.append((T.Text, choice))
-            tokens_groups.append(tokens)
-        fragments_groups = [
-            ptk_formatted_text.PygmentsTokens(tokens)
-            for tokens in tokens_groups
-        ]
-        texts = [
-            ptk_controls.FormattedTextControl(fragments, show_cursor=False)
-            for fragments in fragments_groups
-        ]
-        return [ptk_containers.Window(text, height=1) for text in texts]
+    def _get_choice_state(self, idx: int) -> t.Hashable:
+        """Returns the state of a choice, other than having the cursor.
+
+        Rows are cached per state, so children classes whose rows depend on
+        something else (e.g. CheckboxForm and the selected choices) must
+        return it here.
+        """
+        return None
+
+    def _create_choice_fragments(self, idx: int, is_cursor: bool) -> list:
+        """Creates the fragments for the choice at a given index.
+
+        Children classes can extend the fragments (e.g. CheckboxForm adds
+        the selector after the pointer).
+        """
+        pointer = CURSOR_POINTER if is_cursor else EMPTY_POINTER
+        return [pointer, (style.TEXT, self._choices[idx])]
+
+    def _get_choice_fragments(self, idx: int, is_cursor: bool) -> list:
+        """Returns the fragments for a choice, from the cache if possible."""
+        #  Map from (idx, is_cursor, state) to the fragments of a row.
+        rows = self._cache.get("rows")
+        if rows is None or len(rows) >= ROW_CACHE_SIZE:
+            rows = self._cache["rows"] = {}
+        key = (idx, is_cursor, self._get_choice_state(idx))
+        fragments = rows.get(key)
+        if fragments is None:
+            fragments = self._create_choice_fragments(idx, is_cursor)
+            rows[key] = fragments
+        return fragments
+
+    def _is_loading(self) -> bool:
+        """Whether more choices are still being pulled from the source."""
+        return (
+            isinstance(self._choices, LazyChoices)
+            and not self._choices.exhausted
+        )
+
+    def _has_status_line(self) -> bool:
+        """Whether a line below the choices is needed to report something.
+
+        That's the case when some choices are hidden, when no choice
+        matches the query or when the choices are still being loaded.
+        """
+        size = self._get_view_size()
+        return (
+            size > self._page_size
+            or (size == 0 and self._filtering)
+            or self._is_loading()
+        )
+
+    def _get_status_fragments(self) -> list:
+        """Returns the fragments for the line below the choices."""
+        above = self._idx_top
+        below = self._get_view_size() - self._idx_top - self._page_size
+        parts = []
+        if above > 0:
+            parts.append("↑ {} more".format(above))
+        if below > 0:
+            parts.append("↓ {} more".format(below))
+        if self._get_view_size() == 0 and self._filtering:
+            parts.append("No matches")
+        if self._is_loading():
+            parts.append("Loading...")
+        return [(style.INSTRUCTION, "  {}".format(" ".join(parts)))]
+
+    def _get_choices_fragments(self) -> list:
+        """Returns the fragments for the choices currently in the viewport."""
+        fragments = []
+        end = min(self._idx_top + self._page_size, self._get_view_size())
+        for position in range(self._idx_top, end):
+            if fragments:
+                fragments.append(NEWLINE)
+            idx = self._get_choice_idx(position)
+            is_cursor = position == self._idx_cursor
+            fragments.extend(self._get_choice_fragments(idx, is_cursor))
+        if self._has_status_line():
+            if fragments:
+                fragments.append(NEWLINE)
+            fragments.extend(self._get_status_fragments())
+        return fragments
+
+    def _get_choices_height(self) -> int:
+        """Returns the number of lines needed to display the viewport."""
+        height = min(self._get_view_size(), self._page_size)
+        if self._has_status_line():
+            height += 1
+        return height
+
+    def _on_choices_loaded(self, application: ptk_app.Application) -> None:
+        """Refreshes the form after new choices have been loaded."""
+        if self._query:
+            #  The new choices may match the query too. The cursor is
+            #  kept at the same position rather than reset.
+            self._view = self._index.search(self._query)
+            self._move_cursor_to(self._idx_cursor)
+        application.invalidate()
+
+    def _pre_run(self, application: ptk_app.Application) -> None:
+        """Starts loading lazy Choices in the background, if needed."""
+        if self._is_loading():
+            application.create_background_task(
+                self._choices.load(
+                    lambda: self._on_choices_loaded(application)
+                )
+            )
+
+    def _create_application(self) -> ptk_app.Application:
+        """Creates an Application displaying the form's container."""
+        application = ptk_app.Application(
+            layout=ptk_layout.Layout(self._create_container()),
+            key_bindings=self._key_bindings,
+            full_screen=False,
+            style=self._style,
+        )
+        return share_default_bindings(application)
+
+    def _ask_question(self, answers: dict) -> None:
+        """Asks a question and store the answer in the answers dict."""
+        application = self._create_application()
+        result = application.run(pre_run=lambda: self._start(application))
+        answers[self._name] = self._get_answer(result)
+
+    async def _ask_question_async(self, answers: dict) -> None:
+        """Asks a question and store the answer in the answers dict."""
+        application = self._create_application()
+        result = await application.run_async(
+            pre_run=lambda: self._start(application)
+        )
+        answers[self._name] = self._get_answer(result)
+
+    def _generate_choices_window(self) -> ptk_containers.Window:
+        """Generates a single virtualized Window for the various Choices.
+
+        The text of the Window is computed on each render from the choices
+        in the viewport, so moving the cursor only needs to update
+        self._idx_cursor (and self._idx_top when scrolling).
+        """
+        choices_text = ptk_controls.FormattedTextControl(
+            self._get_choices_fragments, show_cursor=False
+        )
+        return ptk_containers.Window(
+            choices_text, height=self._get_choices_height
+        )
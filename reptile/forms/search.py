@@ -0,0 +1,118 @@
+import re
+import typing as t
+
+
+class ChoicesIndex:
+    """Search index over the Choices of a MultiForm.
+
+    The index lowercases every choice once, when the first search is
+    performed, and keeps the results of the previous searches around. When
+    the user types one more character the new query extends the previous
+    one, so only the choices that matched the previous query need to be
+    checked again; deleting a character simply goes back to a result that
+    was already computed.
+
+    A choice matches a query if the query is a substring of the choice or,
+    failing that, if the characters of the query appear in the choice in
+    the same order (fuzzy match). Results are ranked in three tiers:
+    choices starting with the query, choices containing the query anywhere
+    else and fuzzy matches. Within a tier the original order of the choices
+    is preserved.
+
+    Lazy Choices (see LazyChoices) can grow after the index is built: the
+    new choices are lowercased on the next search, which then starts from
+    scratch since the previous results don't include them.
+
+    Args:
+        choices: The choices to index.
+        lowered: The lowercased choices, as returned by the lowered
+            property of another index over the same Choices. They're only
+            read, so the list can be shared by indices in different threads.
+    """
+
+    def __init__(self, choices: t.Sequence, lowered: list = None) -> None:
+        self._choices = choices
+        self._lowered = lowered
+        #  Stack of (query, candidates, ranked) tuples, one for each
+        #  prefix of the current query. The candidates are the indices of
+        #  all the choices matching the query, in their original order.
+        self._stack = []
+
+    def _build(self) -> None:
+        """Lowercases the choices, which is the bulk of the index."""
+        self._lowered = [str(choice).lower() for choice in self._choices]
+
+    def _extend(self) -> None:
+        """Lowercases the choices added since the index was built."""
+        new_choices = self._choices[len(self._lowered) :]
+        #  A new list, since the current one may be shared.
+        self._lowered = self._lowered + [
+            str(choice).lower() for choice in new_choices
+        ]
+        self._stack = []
+
+    @property
+    def lowered(self) -> t.Optional[list]:
+        """The lowercased choices, if the index has been built already."""
+        return self._lowered
+
+    def search(self, query: str) -> t.List[int]:
+        """Returns the indices of the choices matching a query, ranked.
+
+        Args:
+            query: The text typed by the user. The search is
+                case-insensitive.
+
+        Returns:
+            The list of the matching choices' indices, best matches first.
+        """
+        query = query.lower()
+        if self._lowered is None:
+            self._build()
+        elif len(self._lowered) < len(self._choices):
+            self._extend()
+        #  Results for queries which aren't a prefix of the new one are
+        #  useless, as are the ones for longer queries.
+        while self._stack and not query.startswith(self._stack[-1][0]):
+            self._stack.pop()
+        if self._stack and self._stack[-1][0] == query:
+            return self._stack[-1][2]
+        if self._stack:
+            candidates = self._stack[-1][1]
+        else:
+            candidates = range(len(self._lowered))
+        candidates, ranked = self._match(query, candidates)
+        self._stack.append((query, candidates, ranked))
+        return ranked
+
+    def _match(
+        self, query: str, candidates: t.Iterable[int]
+    ) -> t.Tuple[t.List[int], t.List[int]]:
+        """Matches a query against some candidates.
+
+        Returns:
+            A tuple with the matching candidates (in their original order)
+            and the same candidates ranked.
+        """
+        lowered = self._lowered
+        #  The fuzzy pattern skips to the first occurrence of each char,
+        #  so it never needs to backtrack into the text already consumed.
+        fuzzy = re.compile(
+            "".join("[^{0}]*{0}".format(re.escape(char)) for char in query)
+        ).match
+        #  List comprehensions (rather than a single loop with branches)
+        #  keep the per-choice cost low when there are many candidates.
+        contains = [idx for idx in candidates if query in lowered[idx]]
+        subsequence = [
+            idx
+            for idx in candidates
+            if query not in lowered[idx] and fuzzy(lowered[idx])
+        ]
+        prefix = [idx for idx in contains if lowered[idx].startswith(query)]
+        substring = [
+            idx for idx in contains if not lowered[idx].startswith(query)
+        ]
+        #  Both lists are sorted, so sorting their concatenation is just
+        #  a merge of two runs.
+        matched = sorted(contains + subsequence)
+        return matched, prefix + substring + subsequence
@@ -0,0 +1,108 @@
+import typing as t
+
+#  For each possible byte, the positions of the bits set in it.
+_BITS = [
+    tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)
+]
+
+
+class Selection:
+    """The set of selected choices in a CheckboxForm, as a bitset.
+
+    Each choice takes a single bit, set if the choice's state differs from
+    the default one, and an inversion flag tells what the default is. This
+    makes selecting all the choices, inverting the selection and clearing
+    it constant-time operations regardless of the number of choices, while
+    the bitset only grows up to the highest choice ever toggled.
+
+    Since the selection doesn't know the number of choices, choices added
+    after a select-all or an invert (i.e. lazy Choices still loading) are
+    selected as well.
+    """
+
+    def __init__(self) -> None:
+        self._bits = bytearray()
+        self._inverted = False
+        #  Number of bits set, so that the size is known in constant time.
+        self._flipped = 0
+        #  Incremented on every change, to tell if the selection changed.
+        self.version = 0
+
+    def __contains__(self, idx: int) -> bool:
+        byte_idx = idx >> 3
+        if byte_idx >= len(self._bits):
+            return self._inverted
+        return bool(self._bits[byte_idx] >> (idx & 7) & 1) != self._inverted
+
+    def _flip(self, idx: int) -> None:
+        """Flips the bit of a choice, growing the bitset if needed."""
+        byte_idx = idx >> 3
+        if byte_idx >= len(self._bits):
+            self._bits.extend(bytes(byte_idx + 1 - len(self._bits)))
+        mask = 1 << (idx & 7)
+        self.version += 1
+        self._bits[byte_idx] ^= mask
+        self._flipped += 1 if self._bits[byte_idx] & mask else -1
+
+    def add(self, idx: int) -> None:
+        """Selects a choice."""
+        if idx not in self:
+            self._flip(idx)
+
+    def discard(self, idx: int) -> None:
+        """Deselects a choice."""
+        if idx in self:
+            self._flip(idx)
+
+    def toggle(self, idx: int) -> None:
+        """Selects a choice if it's not selected, deselects it otherwise."""
+        self._flip(idx)
+
+    def select_all(self) -> None:
+        """Selects all the choices."""
+        self._bits = bytearray()
+        self._flipped = 0
+        self._inverted = True
+        self.version += 1
+
+    def clear(self) -> None:
+        """Deselects all the choices."""
+        self._bits = bytearray()
+        self._flipped = 0
+        self._inverted = False
+        self.version += 1
+
+    def invert(self) -> None:
+        """Selects the choices not selected and vice versa."""
+        self._inverted = not self._inverted
+        self.version += 1
+
+    def is_all(self) -> bool:
+        """Whether all the choices are selected."""
+        return self._inverted and self._flipped == 0
+
+    def count(self, size: int) -> int:
+        """Returns the number of selected choices among the first size."""
+        if not self._inverted:
+            return self._flipped
+        return size - self._flipped
+
+    def indices(self, size: int) -> t.Iterator[int]:
+        """Yields the selected choices among the first size, in order.
+
+        The bitset is scanned a byte at a time, so no sorting is needed and
+        bytes without any selected choice are skipped cheaply.
+        """
+        bits = self._bits
+        mask = 0xFF if self._inverted else 0
+        for byte_idx in range((size + 7) >> 3):
+            byte = bits[byte_idx] if byte_idx < len(bits) else 0
+            byte ^= mask
+            if not byte:
+                continue
+            base = byte_idx << 3
+            for bit in _BITS[byte]:
+                idx = base + bit
+                if idx >= size:
+                    return None
+                yield idx
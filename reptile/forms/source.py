@@ -0,0 +1,111 @@
+import asyncio
+import collections.abc
+import threading
+import time
+import typing as t
+
+import prompt_toolkit.eventloop as ptk_eventloop
+
+#  Minimum number of seconds between two updates of the form while
+#  Choices are being loaded. Items arriving in between are batched.
+UPDATE_INTERVAL = 0.05
+
+
+def is_lazy(choices: t.Any) -> bool:
+    """Returns True if Choices needs to be wrapped in LazyChoices."""
+    if choices is None or isinstance(choices, collections.abc.Sequence):
+        return False
+    return isinstance(
+        choices, (collections.abc.Iterable, collections.abc.AsyncIterable)
+    )
+
+
+class LazyChoices(collections.abc.Sequence):
+    """Sequence of choices pulled from an iterator while the form is shown.
+
+    Forms accept Choices as iterators, generators or async iterators, whose
+    items may come from a slow backend. Such Choices are wrapped in a
+    LazyChoices, which only contains the items received so far: len()
+    grows while load() pulls more items in the background, so the form can
+    be displayed (and used) straight away.
+
+    Args:
+        source: The iterable or async iterable producing the choices.
+    """
+
+    def __init__(
+        self, source: t.Union[t.Iterable, t.AsyncIterable]
+    ) -> None:
+        self._items = []
+        self._exhausted = False
+        #  Forms created by a Questionnaire share their LazyChoices, so
+        #  more than one form may be pulling from a sync iterator at once.
+        self._lock = threading.Lock()
+        if isinstance(source, collections.abc.AsyncIterable):
+            self._iterator = source.__aiter__()
+            self._is_async = True
+        else:
+            self._iterator = iter(source)
+            self._is_async = False
+
+    def __getitem__(self, idx: t.Union[int, slice]) -> t.Any:
+        return self._items[idx]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether all the items have been pulled from the source."""
+        return self._exhausted
+
+    def _pull(self) -> None:
+        """Pulls items from a sync iterator for up to UPDATE_INTERVAL.
+
+        This runs in a worker thread, so that a slow iterator never blocks
+        the event loop. It returns as soon as at least one item has been
+        received and UPDATE_INTERVAL is elapsed (or the source is over).
+        The items are stored straight away, so none is lost if the form
+        waiting for them is closed in the meantime.
+        """
+        with self._lock:
+            start = time.monotonic()
+            for item in self._iterator:
+                self._items.append(item)
+                if time.monotonic() - start >= UPDATE_INTERVAL:
+                    return None
+            self._exhausted = True
+
+    async def load(self, on_update: t.Callable[[], None]) -> None:
+        """Pulls all the items from the source, batching the updates.
+
+        Args:
+            on_update: A function called (in the event loop) every time new
+                items have been added and once the source is exhausted.
+        """
+        if not self._is_async:
+            while not self._exhausted:
+                await ptk_eventloop.run_in_executor_with_context(self._pull)
+                on_update()
+            return None
+        last_update = 0.0
+        async for item in self._iterator:
+            self._items.append(item)
+            if time.monotonic() - last_update >= UPDATE_INTERVAL:
+                last_update = time.monotonic()
+                on_update()
+        self._exhausted = True
+        on_update()
+
+    def load_all(self) -> None:
+        """Pulls all the remaining items, blocking until they're received.
+
+        This is used when there's no form displayed (e.g. with preset
+        answers), so async iterators are consumed in a new event loop.
+        """
+        if self._is_async:
+            asyncio.run(self.load(lambda: None))
+        else:
+            with self._lock:
+                self._items.extend(self._iterator)
+                self._exhausted = True
@@ -0,0 +1,63 @@
+import collections
+import inspect
+import typing as t
+
+import prompt_toolkit.eventloop as ptk_eventloop
+
+#  Number of seconds without typing after which the input is validated,
+#  when validating while typing.
+VALIDATION_DELAY = 0.15
+#  Number of validation results remembered by each form.
+VALIDATION_CACHE_SIZE = 256
+
+
+class ResultsCache:
+    """LRU cache of validation results, keyed by the input validated.
+
+    The results are stored as error messages: "" when the input is valid.
+
+    Args:
+        size: The maximum number of results to remember.
+    """
+
+    def __init__(self, size: int = VALIDATION_CACHE_SIZE) -> None:
+        self._size = size
+        self._results = collections.OrderedDict()
+
+    def get(self, key: t.Hashable) -> t.Optional[str]:
+        """Returns the result for an input, or None if there's none."""
+        message = self._results.get(key)
+        if message is not None:
+            self._results.move_to_end(key)
+        return message
+
+    def put(self, key: t.Hashable, message: str) -> None:
+        """Stores the result for an input, evicting the oldest if full."""
+        self._results[key] = message
+        self._results.move_to_end(key)
+        if len(self._results) > self._size:
+            self._results.popitem(last=False)
+
+
+async def run_validate(
+    function: t.Callable, value: t.Any, in_thread: bool
+) -> t.Union[bool, str]:
+    """Runs a Validate function without blocking the event loop.
+
+    Args:
+        function: The Validate function, possibly a coroutine function.
+        value: The value to validate.
+        in_thread: If True, the function is run in a worker thread.
+
+    Returns:
+        What the function returned (awaited, if it was awaitable).
+    """
+    if in_thread:
+        validation = await ptk_eventloop.run_in_executor_with_context(
+            function, value
+        )
+    else:
+        validation = function(value)
+    if inspect.isawaitable(validation):
+        validation = await validation
+    return validation
@@ -0,0 +1,158 @@
+import collections.abc
+import json
+import os
+import re
+import typing as t
+
+from .errors import ReptileError
+from .forms.abstract import AbstractForm
+
+
+class EnvironmentAnswers(collections.abc.Mapping):
+    """Preset answers read from environment variables.
+
+    The answer to the question named Name is read from the variable
+    prefix + NAME, i.e. the name upper-cased and with any character other
+    than letters, digits and underscores replaced by an underscore. Values
+    that look like JSON lists are decoded (so that e.g. '["A", "B"]' can be
+    used for a CheckboxForm), anything else is used as a string.
+
+    Args:
+        prefix: The prefix of the environment variables.
+        environ: The mapping to read the variables from. Defaults to
+            os.environ.
+    """
+
+    def __init__(
+        self, prefix: str = "REPTILE_", environ: t.Mapping = None
+    ) -> None:
+        self._prefix = prefix
+        self._environ = os.environ if environ is None else environ
+
+    def _get_variable(self, name: str) -> str:
+        """Returns the name of the variable for a given question's name."""
+        return self._prefix + re.sub(r"\W", "_", name).upper()
+
+    def __getitem__(self, name: str) -> t.Any:
+        value = self._environ[self._get_variable(name)]
+        if value.lstrip().startswith("["):
+            try:
+                return json.loads(value)
+            except ValueError:
+                pass
+        return value
+
+    def __contains__(self, name: object) -> bool:
+        return (
+            isinstance(name, str)
+            and self._get_variable(name) in self._environ
+        )
+
+    def __iter__(self) -> t.Iterator[str]:
+        #  The questions' names can't be recovered from the variables, so
+        #  the names are the variables without the prefix.
+        for variable in self._environ:
+            if variable.startswith(self._prefix):
+                yield variable[len(self._prefix) :]
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class BatchResult(t.NamedTuple):
+    """The outcome of answering the questions with one set of answers.
+
+    Either answers or error is None: answers is the answers dict (as
+    returned by reptile.prompt()) if the set of answers was valid, error
+    is the exception raised otherwise.
+    """
+
+    index: int
+    answers: t.Optional[dict]
+    error: t.Optional[Exception]
+
+
+def read_answers(source: t.Union[t.Mapping, str, os.PathLike]) -> t.Mapping:
+    """Returns the preset answers from a mapping or a JSON file.
+
+    Args:
+        source: Either a mapping from the questions' names to the answers,
+            returned as is, or the path to a JSON file containing one.
+    """
+    if isinstance(source, collections.abc.Mapping):
+        return source
+    with open(source, "r") as fh:
+        return json.load(fh)
+
+
+def ask_preset(
+    forms: t.List[AbstractForm], preset: t.Mapping, strict: bool = False
+) -> dict:
+    """Answers all the questions with preset answers, without prompting.
+
+    Args:
+        forms: The forms, in order.
+        preset: A mapping from the questions' names to the answers.
+        strict: If True, a missing answer raises MissingAnswer instead of
+            being treated as the user just pressing Enter.
+
+    Returns:
+        The answers dict, as returned by reptile.prompt().
+    """
+    answers = {}
+    for form in forms:
+        form.answer_from_preset(answers, preset, strict)
+    return answers
+
+
+def prompt_many(
+    questions: t.Union[list, dict],
+    records: t.Union[t.Iterable[t.Mapping], str, os.PathLike],
+    strict: bool = False,
+) -> t.Iterator[BatchResult]:
+    """Answers the same questions with many sets of preset answers.
+
+    The questions are compiled and the forms created only once, then
+    each set of answers goes through When, Default, Validate and Transform
+    exactly as reptile.prompt() would do. An invalid set of answers doesn't
+    stop the batch: its error is reported in the relevant BatchResult.
+
+    Args:
+        questions: The questions to ask, either as a single dict or
+            as a list of dicts.
+        records: The sets of answers: either an iterable of mappings or
+            the path to a JSONL file, with one JSON object per line.
+        strict: If True, missing answers are reported as errors.
+
+    Yields:
+        A BatchResult for each set of answers, in order.
+    """
+    from .reptile import compile
+
+    forms = compile(questions).create_forms()
+    if isinstance(records, (str, os.PathLike)):
+        with open(records, "r") as fh:
+            lines = (line for line in fh if line.strip())
+            for index, line in enumerate(lines):
+                yield _answer_record(forms, index, line, strict)
+    else:
+        for index, record in enumerate(records):
+            yield _answer_record(forms, index, record, strict)
+
+
+def _answer_record(
+    forms: t.List[AbstractForm],
+    index: int,
+    record: t.Union[t.Mapping, str],
+    strict: bool,
+) -> BatchResult:
+    """Answers the questions with one set of answers (or a JSON line)."""
+    try:
+        if isinstance(record, str):
+            record = json.loads(record)
+        answers = ask_preset(forms, record, strict)
+    except (ReptileError, ValueError) as error:
+        #  ValueError covers both invalid JSON lines and Transforms
+        #  failing on the answers provided (e.g. int("abc")).
+        return BatchResult(index, None, error)
+    return BatchResult(index, answers, None)
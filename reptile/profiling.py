@@ -0,0 +1,214 @@
+"""Profiling of the questions asked, enabled by REPTILE_PROFILE.
+
+When the environment variable is set, each run of a Questionnaire (i.e.
+each prompt() call) is profiled by a Profiler, which records the events
+(see reptile.events) and prints where the time went, question by question,
+to stderr. The variable can be:
+
+- 1 or summary: only the summary is printed.
+- cprofile[:path]: the run is profiled by cProfile as well, and the stats
+  are dumped to path (default: reptile.prof), e.g. for snakeviz.
+- tracemalloc[:path]: the memory allocated is traced as well, and the
+  snapshot is dumped to path (default: reptile.tracemalloc).
+"""
+
+import collections
+import contextlib
+import os
+import sys
+import typing as t
+import warnings
+
+from . import events
+
+#  Name of the environment variable enabling the profiling.
+PROFILE_VARIABLE = "REPTILE_PROFILE"
+#  Default path of the dump for each mode.
+DEFAULT_PATHS = {
+    "summary": None,
+    "cprofile": "reptile.prof",
+    "tracemalloc": "reptile.tracemalloc",
+}
+#  Columns of the summary, as (key, header).
+COLUMNS = [
+    ("build_ms", "build"),
+    ("first_render_ms", "first render"),
+    ("keys", "keys"),
+    ("keys_ms", "keys ms"),
+    ("renders", "renders"),
+    ("renders_ms", "renders ms"),
+    ("validations", "validations"),
+    ("validations_ms", "validations ms"),
+    ("commit_ms", "commit"),
+    ("total_ms", "total"),
+]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+class Profiler:
+    """Records the events while active and summarises them on exit.
+
+    Note that cProfile only profiles the thread which entered the
+    Profiler, while the summary includes the events of all the threads.
+
+    Args:
+        mode: One of summary, cprofile and tracemalloc.
+        path: Where to dump the stats of cProfile or tracemalloc.
+        stream: Where to write the summary. Defaults to sys.stderr.
+    """
+
+    def __init__(
+        self,
+        mode: str = "summary",
+        path: t.Optional[str] = None,
+        stream: t.Optional[t.TextIO] = None,
+    ) -> None:
+        if mode not in DEFAULT_PATHS:
+            raise ValueError("Unknown profiling mode: {}.".format(mode))
+        self._mode = mode
+        self._path = path or DEFAULT_PATHS[mode]
+        self._stream = stream
+        self._profile = None
+        self._tracing = False
+        self.events = []
+        self.peak_memory = None
+
+    def __enter__(self) -> "Profiler":
+        events.add_hook(self.events.append)
+        if self._mode == "cprofile":
+            import cProfile
+
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif self._mode == "tracemalloc":
+            import tracemalloc
+
+            #  If something else is tracing already, it's left alone.
+            self._tracing = not tracemalloc.is_tracing()
+            if self._tracing:
+                tracemalloc.start()
+        return self
+
+    def __exit__(self, *_: t.Any) -> None:
+        events.remove_hook(self.events.append)
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self._path)
+        elif self._mode == "tracemalloc":
+            import tracemalloc
+
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.take_snapshot().dump(self._path)
+            if self._tracing:
+                tracemalloc.stop()
+        stream = self._stream or sys.stderr
+        stream.write(self.format_summary())
+
+    def summarise(self) -> t.Dict[str, dict]:
+        """Returns the timings of each question, by Name.
+
+        Times are in milliseconds (None if the step didn't happen). Keys,
+        renders and validations are counted and their durations summed.
+        """
+        totals = collections.OrderedDict()
+        opened = {}
+        closed = {}
+        validating = {}
+
+        def add(row: collections.Counter, key: str, duration: float) -> None:
+            row[key] += 1
+            row[key + "_ms"] += duration
+
+        for event in self.events:
+            if event.form is None:
+                continue
+            row = totals.setdefault(event.form, collections.Counter())
+            if event.name == events.FORM_BUILT:
+                row["build_ms"] = event.data["duration"]
+            elif event.name == events.FORM_OPENED:
+                opened[event.form] = event.time
+            elif event.name == events.FIRST_RENDER:
+                start = opened.get(event.form, event.time)
+                row["first_render_ms"] = event.time - start
+            elif event.name == events.KEY_HANDLED:
+                add(row, "keys", event.data["duration"])
+            elif event.name == events.RENDERED:
+                add(row, "renders", event.data["duration"])
+            elif event.name == events.VALIDATION_STARTED:
+                validating[event.form] = event.time
+            elif event.name == events.VALIDATION_ENDED:
+                start = validating.pop(event.form, event.time)
+                add(row, "validations", event.time - start)
+            elif event.name == events.FORM_CLOSED:
+                closed[event.form] = event.time
+            elif event.name == events.ANSWER_COMMITTED:
+                start = closed.get(event.form, event.time)
+                row["commit_ms"] = event.time - start
+                if event.form in opened:
+                    row["total_ms"] = event.time - opened[event.form]
+        summary = collections.OrderedDict()
+        for name, row in totals.items():
+            summary[name] = {
+                key: (
+                    (_ms(row[key]) if key.endswith("_ms") else row[key])
+                    if key in row
+                    else None
+                )
+                for key, _ in COLUMNS
+            }
+        return summary
+
+    def format_summary(self) -> str:
+        """Returns the summary as a table, one question per line."""
+        summary = self.summarise()
+        headers = ["question"] + [header for _, header in COLUMNS]
+        rows = [
+            [name]
+            + ["" if row[key] is None else str(row[key]) for key, _ in COLUMNS]
+            for name, row in summary.items()
+        ]
+        widths = [
+            max(len(line[column]) for line in [headers] + rows)
+            for column in range(len(headers))
+        ]
+        lines = ["Reptile profile (times in ms)"]
+        for line in [headers] + rows:
+            lines.append(
+                "  ".join(
+                    cell.ljust(width) if column == 0 else cell.rjust(width)
+                    for column, (cell, width) in enumerate(zip(line, widths))
+                )
+            )
+        if self.peak_memory is not None:
+            peak = self.peak_memory / 1024
+            lines.append("Peak memory: {:.1f}KB".format(peak))
+        if self._path is not None:
+            lines.append("Stats dumped to {}".format(self._path))
+        return "\n".join(lines) + "\n"
+
+
+def from_environment(
+    environ: t.Optional[t.Mapping[str, str]] = None
+) -> t.ContextManager:
+    """Returns a Profiler as configured by REPTILE_PROFILE.
+
+    If the variable isn't set (or is 0), a context manager that does
+    nothing is returned instead.
+    """
+    environ = os.environ if environ is None else environ
+    value = environ.get(PROFILE_VARIABLE, "")
+    if value in ("", "0"):
+        return contextlib.nullcontext()
+    mode, _, path = value.partition(":")
+    if mode == "1":
+        mode = "summary"
+    if mode not in DEFAULT_PATHS:
+        message = "Unknown {} mode {!r}, using summary.".format(
+            PROFILE_VARIABLE, mode
+        )
+        warnings.warn(message)
+        mode, path = "summary", ""
+    return Profiler(mode, path or None)
@@ -1,82 +1,95 @@
+import collections.abc
+import importlib
+import os
+import time
+import types
 import typing as t
 
-import prompt_toolkit.styles as ptk_style
-from pygments.token import Token as T
+from .errors import (
+    InvalidFormType,
+    MissingFormType,
+    NotUniqueNames,
+    UnnamedQuestion,
+)
+from .style import get_default_style
 
-from .forms.checkbox import CheckboxForm
-from .forms.confirm import ConfirmForm
-from .forms.input import InputForm
-from .forms.list import ListForm
+#  Neither prompt_toolkit nor the forms are imported here: they're only
+#  needed once a question is actually asked, and many programs import
+#  reptile without ever prompting. Keep it that way (see test_import.py).
 
 
-#  The default style for the various forms. This can be overwritten
-#  by passing a new style to the question (key: 'Style').
-DEFAULT_STYLE = ptk_style.style_from_pygments_dict(
-    {
-        #  Style for the answer once it has been submitted.
-        T.Answer: "#FF9D00 bold",
-        #  Style for the erorr message (validation).
-        T.Error: "#E6E5E6 bg:#5F0000",
-        #  Style for the instruction snippets.
-        T.Instruction: "",
-        #  Style used for the cursor (pointer) in MultiForms.
-        T.Pointer: "#FF9D00 bold",
-        #  Style used for the text in the question.
-        T.Question: "bold",
-        #  Style for the text prepended to the question (i.e. [?]).
-        T.QuestionMark: "#A4F743 bold",
-        # Style for the selector (in CheckboxForm).
-        T.Selector: "#FF9D00",
-    }
-)
-#  Only the following types are valid questions' types. They each
-#  map to a specific form. If a question is asked with a different
-#  type an error is raised.
-ACCEPTED_TYPES = ["Checkbox", "Confirm", "Input", "List"]
-# Map from the string type to the correspondent class.
-FORMS_MAP = {
-    "Checkbox": CheckboxForm,
-    "Confirm": ConfirmForm,
-    "List": ListForm,
-    "Input": InputForm,
-}
+class FormsMap(collections.abc.MutableMapping):
+    """Map from the questions' types to the correspondent form classes.
 
+    The classes are given as dotted paths (relative to the reptile package)
+    and only imported the first time they're looked up. Classes can also be
+    assigned directly, e.g. to replace one of the built-in forms.
 
-class ReptileError(Exception):
-    """Basic error for Reptile."""
+    Args:
+        paths: Map from each type to the path of its form class.
+    """
 
+    def __init__(self, paths: t.Dict[str, str]) -> None:
+        self._paths = dict(paths)
+        self._classes = {}
 
-class UnnamedQuestion(ReptileError):
-    """Raised when one of the question doesn't have the field Name."""
+    def __getitem__(self, form_type: str) -> type:
+        if form_type not in self._classes:
+            path = self._paths[form_type]
+            module_name, _, class_name = path.rpartition(".")
+            module = importlib.import_module(module_name, __package__)
+            self._classes[form_type] = getattr(module, class_name)
+        return self._classes[form_type]
 
+    def __setitem__(self, form_type: str, form_class: type) -> None:
+        self._paths[form_type] = None
+        self._classes[form_type] = form_class
 
-class NotUniqueNames(ReptileError):
-    """Raised when two or more questions share the same name."""
+    def __delitem__(self, form_type: str) -> None:
+        del self._paths[form_type]
+        self._classes.pop(form_type, None)
 
+    def __iter__(self) -> t.Iterator[str]:
+        return iter(self._paths)
 
-class InvalidFormType(ReptileError):
-    """Raised when the question's type is not included in ACCEPTED_TYPES."""
+    def __len__(self) -> int:
+        return len(self._paths)
 
 
-class MissingFormType(ReptileError):
-    """Raised when one of the questions is missing the field Type."""
+#  Only the following types are valid questions' types. They each
+#  map to a specific form. If a question is asked with a different
+#  type an error is raised.
+ACCEPTED_TYPES = ["Checkbox", "Confirm", "Input", "List"]
+# Map from the string type to the correspondent class.
+FORMS_MAP = FormsMap(
+    {
+        "Checkbox": ".forms.checkbox.CheckboxForm",
+        "Confirm": ".forms.confirm.ConfirmForm",
+        "List": ".forms.list.ListForm",
+        "Input": ".forms.input.InputForm",
+    }
+)
 
 
-def prompt(questions: t.Union[list, dict]) -> dict:
-    """The primary function the user should interact with.
+def __getattr__(name: str) -> t.Any:
+    #  DEFAULT_STYLE used to be built at import time: it's still
+    #  available under that name, but built on first access (see
+    #  style.get_default_style()).
+    if name == "DEFAULT_STYLE":
+        return get_default_style()
+    message = "module {!r} has no attribute {!r}".format(__name__, name)
+    raise AttributeError(message)
 
-    It takes some questions (either as a single dict or a list of dicts),
-    creates the relevant froms (depending on the key Type) and store
-    the responses in the output dict, answers.
+
+def _check_questions(questions: t.Union[list, dict]) -> t.List[dict]:
+    """Validates the questions, raising an error if any is invalid.
 
     Args:
         questions: The questions to ask, either as a single dict or
             as a list of dicts.
 
     Returns:
-        The answers dict with contains for each question the relevant
-        answer. The answers are under a key named after the Name field
-        in the relevant question.
+        The questions as a list of dicts.
     """
 
     def _check_questions_are_named(questions: t.List[dict]) -> None:
@@ -109,12 +122,217 @@ def prompt(questions: t.Union[list, dict]) -> dict:
     _check_questions_are_named(questions)
     _check_names_are_unique(questions)
     _check_valid_form_types(questions)
-    forms = []
-    answers = {}
-    for question in questions:
-        if "Style" not in question or not question["Style"]:
-            question["Style"] = DEFAULT_STYLE
-        forms.append(FORMS_MAP[question["Type"]](**question))
-    for form in forms:
-        form.ask_question(answers)
-    return answers
+    return questions
+
+
+class CompiledQuestion(t.NamedTuple):
+    """A validated question, as stored by a Questionnaire.
+
+    The cache holds the static parts of the form (e.g. the fragments of
+    each choice), which are shared by all the forms created for the
+    question instead of being rebuilt every time it's asked.
+    """
+
+    form_class: type
+    question: t.Mapping
+    cache: dict
+
+
+class Questionnaire:
+    """A list of questions validated once, to be asked many times.
+
+    Questionnaires are created by compile(). The questions are copied, so
+    later changes to the dicts passed to compile() don't affect it (lists
+    of Choices and Values are turned into tuples for the same reason),
+    and never modified. Each run creates new forms, which share their
+    static parts through the CompiledQuestion's cache: a Questionnaire can
+    therefore be run repeatedly, and from several threads at once.
+
+    Note that Choices given as an iterator are pulled only once, and the
+    choices received are then kept for the following runs.
+
+    Args:
+        questions: The questions to ask, either as a single dict or
+            as a list of dicts.
+    """
+
+    def __init__(self, questions: t.Union[list, dict]) -> None:
+        from .forms.source import LazyChoices, is_lazy
+
+        compiled = []
+        for question in _check_questions(questions):
+            question = dict(question)
+            for key in ("Choices", "Values"):
+                if isinstance(question.get(key), list):
+                    question[key] = tuple(question[key])
+            if is_lazy(question.get("Choices")):
+                #  The iterator is consumed once and for all: the choices
+                #  received are shared by the forms of all the runs.
+                question["Choices"] = LazyChoices(question["Choices"])
+            compiled.append(
+                CompiledQuestion(
+                    FORMS_MAP[question["Type"]],
+                    types.MappingProxyType(question),
+                    {},
+                )
+            )
+        self._questions = tuple(compiled)
+
+    @property
+    def questions(self) -> t.Tuple[CompiledQuestion, ...]:
+        """The compiled questions, in order."""
+        return self._questions
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def create_forms(self) -> list:
+        """Creates a new form for each question, in order."""
+        from . import events
+
+        forms = []
+        for compiled in self._questions:
+            start = time.perf_counter()
+            form = compiled.form_class(**compiled.question)
+            form._use_cache(compiled.cache)
+            duration = time.perf_counter() - start
+            events.emit(events.FORM_BUILT, form._name, duration=duration)
+            forms.append(form)
+        return forms
+
+    def run(
+        self,
+        single_app: bool = False,
+        preset: t.Union[t.Mapping, str, os.PathLike] = None,
+        strict: bool = False,
+    ) -> dict:
+        """Asks the questions, as prompt() does (see its arguments).
+
+        If REPTILE_PROFILE is set, the run is profiled (see profiling).
+        """
+        from . import events, profiling
+
+        with profiling.from_environment():
+            events.emit(events.PROMPT_STARTED)
+            answers = self._ask(single_app, preset, strict)
+            events.emit(events.PROMPT_ENDED)
+        return answers
+
+    def _ask(
+        self,
+        single_app: bool,
+        preset: t.Union[t.Mapping, str, os.PathLike],
+        strict: bool,
+    ) -> dict:
+        """Creates the forms and asks the questions, see run()."""
+        forms = self.create_forms()
+        if preset is not None:
+            from .headless import ask_preset, read_answers
+
+            return ask_preset(forms, read_answers(preset), strict)
+        answers = {}
+        if single_app:
+            from .session import Session
+
+            Session().run(forms, answers)
+            return answers
+        for form in forms:
+            form.ask_question(answers)
+        return answers
+
+    async def run_async(self, single_app: bool = False) -> dict:
+        """Asks the questions, as prompt_async() does."""
+        from . import events, profiling
+
+        with profiling.from_environment():
+            events.emit(events.PROMPT_STARTED)
+            answers = await self._ask_async(single_app)
+            events.emit(events.PROMPT_ENDED)
+        return answers
+
+    async def _ask_async(self, single_app: bool) -> dict:
+        """Creates the forms and asks the questions, see run_async()."""
+        forms = self.create_forms()
+        answers = {}
+        if single_app:
+            from .session import Session
+
+            await Session().run_async(forms, answers)
+            return answers
+        for form in forms:
+            await form.ask_question_async(answers)
+        return answers
+
+
+def compile(questions: t.Union[list, dict]) -> Questionnaire:
+    """Validates some questions, to ask them many times.
+
+    prompt() validates the questions and creates the forms every time it's
+    called. When the same questions are asked repeatedly (e.g. in a loop),
+    compile them once instead and call run() on the Questionnaire.
+
+    Args:
+        questions: The questions to ask, either as a single dict or
+            as a list of dicts.
+
+    Returns:
+        The Questionnaire, immutable and safe to share between threads.
+    """
+    return Questionnaire(questions)
+
+
+def prompt(
+    questions: t.Union[list, dict],
+    single_app: bool = False,
+    preset: t.Union[t.Mapping, str, os.PathLike] = None,
+    strict: bool = False,
+) -> dict:
+    """The primary function the user should interact with.
+
+    It takes some questions (either as a single dict or a list of dicts),
+    creates the relevant froms (depending on the key Type) and store
+    the responses in the output dict, answers.
+
+    Args:
+        questions: The questions to ask, either as a single dict or
+            as a list of dicts.
+        single_app: If True, all the questions are displayed by a single
+            Application (see Session) rather than one per question, which
+            removes the setup cost between questions.
+        preset: If specified, the questions are answered with these
+            answers rather than by the user, and nothing is displayed.
+            Either a mapping from the questions' names to the answers (as
+            the user would type or select them, see also
+            headless.EnvironmentAnswers) or the path to a JSON file
+            containing one.
+        strict: Only used with preset. If True, a missing answer raises
+            MissingAnswer instead of being treated as the user just
+            pressing Enter.
+
+    Returns:
+        The answers dict with contains for each question the relevant
+        answer. The answers are under a key named after the Name field
+        in the relevant question.
+    """
+    return Questionnaire(questions).run(single_app, preset, strict)
+
+
+async def prompt_async(
+    questions: t.Union[list, dict], single_app: bool = False
+) -> dict:
+    """Same as prompt(), but without blocking the event loop.
+
+    The forms run on the current event loop, so other tasks keep running
+    while the user answers. When, Validate and Transform can be coroutine
+    functions, in which case they're awaited.
+
+    Args:
+        questions: The questions to ask, either as a single dict or
+            as a list of dicts.
+        single_app: If True, all the questions are displayed by a single
+            Application (see Session) rather than one per question.
+
+    Returns:
+        The answers dict, as returned by prompt().
+    """
+    return await Questionnaire(questions).run_async(single_app)
@@ -0,0 +1,133 @@
+"""Serving questionnaires to remote users over telnet.
+
+A QuestionnaireServer asks the same questions to every user connecting to
+it, each with their own input and output, all on a single event loop:
+no thread nor process is created per connection.
+
+    async def save(answers, connection):
+        print(connection.addr, answers)
+
+    asyncio.run(QuestionnaireServer(questions, save, port=2323).run())
+"""
+
+import asyncio
+import inspect
+import socket
+import typing as t
+
+import prompt_toolkit.contrib.telnet.server as ptk_telnet
+
+from .reptile import Questionnaire, compile
+
+#  Number of pending connections the listening socket accepts, so that
+#  many users connecting at once aren't refused (prompt_toolkit uses 4).
+BACKLOG = 128
+
+
+class _TelnetServer(ptk_telnet.TelnetServer):
+    """TelnetServer with a larger backlog and a port chosen by the OS.
+
+    If the port is 0, a free port is picked and stored as the port.
+    """
+
+    def _create_socket(self, host: str, port: int) -> socket.socket:
+        listening = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listening.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listening.bind((host, port))
+        listening.listen(BACKLOG)
+        self.port = listening.getsockname()[1]
+        return listening
+
+
+class QuestionnaireServer:
+    """Asks questions to the users connecting over telnet.
+
+    The questions are compiled once (see reptile.compile()), and each
+    connection runs them with Questionnaire.run_async(). By default a
+    single Application displays all the questions of a connection (see
+    Session), which keeps the memory of each session small: an idle
+    session takes a few hundred KB and three file descriptors (the socket
+    and the pipe its keys are fed through).
+
+    A user closing the connection (or pressing Ctrl-C/Ctrl-D where the
+    form handles them) ends their session without any answers.
+
+    Args:
+        questions: The questions to ask, as for reptile.prompt(), or a
+            Questionnaire.
+        on_answers: Called with the answers dict and the prompt_toolkit
+            TelnetConnection once a user has answered all the questions.
+            It can be a coroutine function, in which case it's awaited
+            before the connection is closed.
+        host: The address to listen on.
+        port: The port to listen on. If 0, a free port is picked (see the
+            port attribute once the server is ready).
+        single_app: If False, each question is displayed by its own
+            Application, as reptile.prompt() does by default.
+        enable_cpr: Whether to ask the clients for the cursor position,
+            which most terminals support.
+    """
+
+    def __init__(
+        self,
+        questions: t.Union[list, dict, Questionnaire],
+        on_answers: t.Callable[[dict, ptk_telnet.TelnetConnection], t.Any],
+        host: str = "127.0.0.1",
+        port: int = 2323,
+        single_app: bool = True,
+        enable_cpr: bool = True,
+    ) -> None:
+        if not isinstance(questions, Questionnaire):
+            questions = compile(questions)
+        self._questionnaire = questions
+        self._on_answers = on_answers
+        self._single_app = single_app
+        self._server = _TelnetServer(
+            host=host,
+            port=port,
+            interact=self._interact,
+            enable_cpr=enable_cpr,
+        )
+
+    @property
+    def port(self) -> int:
+        """The port the server listens on."""
+        return self._server.port
+
+    @property
+    def sessions(self) -> int:
+        """The number of users connected."""
+        return len(self._server.connections)
+
+    async def _interact(self, connection: ptk_telnet.TelnetConnection) -> None:
+        """Asks the questions to a user, then hands over the answers."""
+        answers = await self._questionnaire.run_async(self._single_app)
+        handled = self._on_answers(answers, connection)
+        if inspect.isawaitable(handled):
+            await handled
+
+    async def run(self, ready_cb: t.Optional[t.Callable[[], None]] = None):
+        """Serves the questions until cancelled.
+
+        Args:
+            ready_cb: Called once the server is listening.
+        """
+        await self._server.run(ready_cb=ready_cb)
+
+
+def serve(
+    questions: t.Union[list, dict, Questionnaire],
+    on_answers: t.Callable[[dict, ptk_telnet.TelnetConnection], t.Any],
+    host: str = "127.0.0.1",
+    port: int = 2323,
+    **kwargs: t.Any
+) -> None:
+    """Serves the questions over telnet, blocking until interrupted.
+
+    See QuestionnaireServer for the arguments.
+    """
+    server = QuestionnaireServer(questions, on_answers, host, port, **kwargs)
+    try:
+        asyncio.run(server.run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,191 @@
+import inspect
+import typing as t
+
+import prompt_toolkit.application as ptk_app
+import prompt_toolkit.key_binding as ptk_key_binding
+import prompt_toolkit.layout.containers as ptk_containers
+import prompt_toolkit.layout.controls as ptk_controls
+import prompt_toolkit.layout.layout as ptk_layout
+import prompt_toolkit.styles as ptk_style
+
+from . import events, style
+from .forms.abstract import AbstractForm, share_default_bindings
+
+
+class Session:
+    """Displays a whole list of forms in a single Application.
+
+    Normally each form creates (and tears down) its own Application, which
+    means setting up the terminal, switching to raw mode and back, etc. for
+    every single question. A Session runs one Application for all of them
+    instead: the layout, key bindings and style of the current form are
+    swapped in when the previous form is submitted. The questions already
+    answered are summarised above the current form, one line each.
+    """
+
+    def __init__(self) -> None:
+        #  Placeholder displayed when there's no form to display.
+        self._empty = ptk_containers.Window(height=0)
+        self._form = None
+        self._container = self._empty
+        self._forms = None
+        self._answers = None
+        self._transcript = []
+        self._transcript_height = 0
+        transcript_text = ptk_controls.FormattedTextControl(
+            lambda: self._transcript,
+            show_cursor=False,
+        )
+        transcript_window = ptk_containers.Window(
+            transcript_text,
+            height=lambda: self._transcript_height,
+        )
+        body = ptk_containers.HSplit(
+            [
+                transcript_window,
+                ptk_containers.DynamicContainer(lambda: self._container),
+            ]
+        )
+        self._application = ptk_app.Application(
+            layout=ptk_layout.Layout(body),
+            key_bindings=ptk_key_binding.DynamicKeyBindings(
+                lambda: self._form._key_bindings if self._form else None
+            ),
+            style=ptk_style.DynamicStyle(
+                lambda: self._form._style if self._form else None
+            ),
+            full_screen=False,
+        )
+        share_default_bindings(self._application)
+
+    def _focus(self, container: ptk_containers.Container) -> None:
+        """Focuses the first focusable window of a container, if any."""
+        layout = self._application.layout
+        try:
+            layout.focus(container)
+        except ValueError:
+            #  Forms such as ListForm have nothing to focus, but the focus
+            #  must not stay on a window of the previous form.
+            layout.focus(next(layout.find_all_windows()))
+
+    def _mount(self, form: AbstractForm) -> None:
+        """Swaps the container and key bindings of a form into place."""
+        self._form = form
+        self._container = form._create_container()
+        self._focus(self._container)
+        form._on_submit = self._on_submit
+        form._pre_run(self._application)
+        self._application.invalidate()
+
+    def _unmount(self) -> None:
+        """Removes the current form, so that keys are ignored meanwhile."""
+        self._form = None
+        self._container = self._empty
+        self._focus(self._application.layout.container)
+
+    def _defer(
+        self, awaitable: t.Awaitable, callback: t.Callable[[t.Any], None]
+    ) -> None:
+        """Awaits the result of a coroutine When or Transform.
+
+        The callback is called with the result once it's available, while
+        the Application keeps running in the meantime.
+        """
+
+        async def wait() -> None:
+            try:
+                callback(await awaitable)
+            except Exception as exception:
+                self._application.exit(exception=exception)
+
+        self._application.create_background_task(wait())
+
+    def _skip(self, form: AbstractForm) -> None:
+        """Moves past a form that shouldn't be asked."""
+        events.emit(events.FORM_SKIPPED, form._name)
+        self._next()
+
+    def _next(self) -> None:
+        """Displays the next question to ask, or exits if there's none."""
+        for form in self._forms:
+            events.emit(events.FORM_OPENED, form._name)
+            should_ask = form._should_ask(self._answers)
+            if inspect.isawaitable(should_ask):
+                self._defer(
+                    should_ask,
+                    lambda ask, form=form: (
+                        self._mount(form) if ask else self._skip(form)
+                    ),
+                )
+                return None
+            if should_ask:
+                self._mount(form)
+                return None
+            events.emit(events.FORM_SKIPPED, form._name)
+        #  Only the transcript is left on screen once all the questions
+        #  have been answered.
+        self._application.exit()
+
+    def _on_submit(self, result: t.Any) -> None:
+        """Stores the answer of the current form and moves to the next.
+
+        This is called from within the key binding that submits the form,
+        so the next form is in place before any other key is processed:
+        keys typed ahead are never handled by the form just submitted.
+        """
+        form = self._form
+        form._on_submit = None
+        self._unmount()
+        events.emit(events.FORM_CLOSED, form._name)
+        try:
+            self._answers[form._name] = form._get_answer(result)
+            self._transcript.extend(
+                [
+                    (style.QUESTION_MARK, "[?] "),
+                    (style.QUESTION, form._message + " "),
+                    (style.ANSWER, form._get_result_text(result)),
+                    (style.TEXT, "\n"),
+                ]
+            )
+            self._transcript_height += 1
+            committed = form._commit_answer(self._answers)
+            if committed is not None:
+                self._defer(committed, lambda _: self._committed(form))
+            else:
+                self._committed(form)
+        except Exception as exception:
+            self._application.exit(exception=exception)
+
+    def _committed(self, form: AbstractForm) -> None:
+        """Moves to the next form once the answer of one is committed."""
+        events.emit(events.ANSWER_COMMITTED, form._name)
+        self._next()
+
+    def _watch(self) -> None:
+        """Watches the Application if any hook is registered (see events)."""
+        if events.enabled():
+            events.ApplicationWatcher(
+                self._application,
+                lambda: self._form._name if self._form else None,
+            )
+
+    def run(self, forms: t.List[AbstractForm], answers: dict) -> None:
+        """Asks all the questions and stores the answers in the dict.
+
+        Args:
+            forms: The forms to display, in order.
+            answers: the dict where to store the answers.
+        """
+        self._forms = iter(forms)
+        self._answers = answers
+        self._watch()
+        self._application.run(pre_run=self._next)
+
+    async def run_async(
+        self, forms: t.List[AbstractForm], answers: dict
+    ) -> None:
+        """Same as run(), but without blocking the event loop."""
+        self._forms = iter(forms)
+        self._answers = answers
+        self._watch()
+        await self._application.run_async(pre_run=self._next)
@@ -0,0 +1,52 @@
+"""Style classes used by the forms and the default style.
+
+The forms build their text directly as prompt_toolkit fragments, i.e.
+(style, text) tuples, using the classes below. A custom style can be
+passed to a question (key: 'Style') to change how each of them looks,
+e.g. Style.from_dict({"pointer": "#00FF00 bold"}).
+"""
+
+import functools
+import typing as t
+
+if t.TYPE_CHECKING:
+    import prompt_toolkit.styles
+
+#  Style for the answer once it has been submitted.
+ANSWER = "class:answer"
+#  Style for the error message (validation).
+ERROR = "class:error"
+#  Style for the instruction snippets.
+INSTRUCTION = "class:instruction"
+#  Style used for the cursor (pointer) in MultiForms.
+POINTER = "class:pointer"
+#  Style used for the text in the question.
+QUESTION = "class:question"
+#  Style for the text prepended to the question (i.e. [?]).
+QUESTION_MARK = "class:question-mark"
+#  Style for the selector (in CheckboxForm).
+SELECTOR = "class:selector"
+#  Style for the choices and any other text.
+TEXT = "class:text"
+
+
+@functools.lru_cache(maxsize=None)
+def get_default_style() -> "prompt_toolkit.styles.Style":
+    """Returns the default style for the various forms.
+
+    The style is built (and compiled by prompt_toolkit) once, on first use,
+    and then shared by all the forms which don't specify their own.
+    """
+    import prompt_toolkit.styles as ptk_style
+
+    return ptk_style.Style.from_dict(
+        {
+            "answer": "#FF9D00 bold",
+            "error": "#E6E5E6 bg:#5F0000",
+            "instruction": "",
+            "pointer": "#FF9D00 bold",
+            "question": "bold",
+            "question-mark": "#A4F743 bold",
+            "selector": "#FF9D00",
+        }
+    )
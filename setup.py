@@ -24,7 +24,7 @@ setuptools.setup(
         "command-line-interface, python-inquiry, inquirer, "
         "reptile, REPL, prompt"
     ),
-    install_requires=["prompt-toolkit>=3.0.5", "pygments>=2.6.1"],
-    python_requires=">=3.6",
+    install_requires=["prompt-toolkit>=3.0.5"],
+    python_requires=">=3.7",
     packages=setuptools.find_packages(),
 )
@@ -0,0 +1,61 @@
+"""Benchmark for the completion of InputForms over a large Vocabulary.
+
+It builds a VocabularyIndex over random identifiers and measures the time
+to build it, its memory footprint (compared with the same words kept in a
+plain list) and the time to complete prefixes of increasing length, as the
+user would type them. The results are printed as JSON.
+
+    python tests/benchmarks/bench_completion.py --words 1000000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import string
+import sys
+import time
+
+from reptile.forms.completion import VocabularyIndex
+
+ALPHABET = string.ascii_lowercase + string.digits + "-_."
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=10 ** 6)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    words = [
+        "".join(rng.choices(ALPHABET, k=rng.randint(5, 25)))
+        for _ in range(args.words)
+    ]
+    start = time.perf_counter()
+    index = VocabularyIndex(words)
+    build_seconds = time.perf_counter() - start
+    list_bytes = sys.getsizeof(words) + sum(map(sys.getsizeof, words))
+    timings = []
+    for _ in range(args.queries):
+        word = rng.choice(words)
+        for size in range(1, min(len(word), 6) + 1):
+            start = time.perf_counter()
+            index.complete(word[:size])
+            timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    results = {
+        "words": len(index),
+        "build_s": round(build_seconds, 3),
+        "index_mb": round(index.memory_size() / 1e6, 2),
+        "list_mb": round(list_bytes / 1e6, 2),
+        "keystroke_median_us": round(statistics.median(timings), 1),
+        "keystroke_p99_us": round(timings[int(len(timings) * 0.99)], 1),
+        "keystroke_max_us": round(timings[-1], 1),
+    }
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
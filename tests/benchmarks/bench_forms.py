@@ -0,0 +1,276 @@
+"""Benchmark suite driving the forms with scripted keystrokes.
+
+Each form is run for real, as reptile.prompt() runs it, but reading its
+keys from a pipe and rendering to a dummy output that records when each
+frame is flushed. For each form type and number of Choices the suite
+measures:
+
+- construct_ms: the time to create the form from its question.
+- first_paint_ms: the time from asking the question to the first frame.
+- keystroke_*_ms: the time from sending a key to the frame showing it.
+- peak_kb: the memory allocated at the peak of a run (in a separate run,
+  with tracemalloc, so it doesn't slow down the timings).
+
+Full reptile.prompt() runs (with and without single_app) and the import
+time are measured as well. The results are printed as JSON and can be
+stored with --output; with --baseline, the timings are compared with
+stored results and the script fails if any got slower than --tolerance
+times the baseline, so regressions can be tracked across commits.
+
+    python tests/benchmarks/bench_forms.py --output results.json
+    python tests/benchmarks/bench_forms.py --baseline results.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+import prompt_toolkit
+import prompt_toolkit.application as ptk_app
+import prompt_toolkit.input as ptk_input
+import prompt_toolkit.output as ptk_output
+
+import bench_import
+import reptile
+
+DOWN = "\x1b[B"
+UP = "\x1b[A"
+PAGE_DOWN = "\x1b[6~"
+END = "\x1b[F"
+HOME = "\x1b[H"
+BACKSPACE = "\x7f"
+#  Escape is never sent on its own: prompt_toolkit waits to know whether
+#  it starts a longer sequence, which would count as latency.
+SCRIPTS = {
+    "List": [DOWN] * 10 + [UP] * 3 + [PAGE_DOWN, END, HOME]
+    + ["/", "4", "2", BACKSPACE, BACKSPACE, "\r"],
+    "Checkbox": [" ", DOWN] * 5 + [PAGE_DOWN, END, HOME, "a", "i", "a"]
+    + ["/", "4", "2", " ", "\r"],
+    "Input": list("hello world") + [BACKSPACE] * 5 + ["\r"],
+    "Confirm": ["y"],
+}
+#  Forms whose cost depends on the number of Choices.
+SIZED = {"List", "Checkbox"}
+DEFAULT_SIZES = [10, 100, 1000, 10 ** 4, 10 ** 5, 10 ** 6]
+#  Timings compared with the baseline: the maximum and the percentiles of
+#  the latencies are too noisy to tell regressions.
+COMPARED = ["construct_ms", "first_paint_ms", "keystroke_median_ms", "total_ms"]
+#  Seconds to wait for a frame before giving up on a key.
+TIMEOUT = 10.0
+
+
+class RecordingOutput(ptk_output.DummyOutput):
+    """Dummy output recording when frames are flushed to the terminal."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.first_paint = None
+        self.last_paint = None
+        self.painted = threading.Event()
+
+    def flush(self) -> None:
+        self.last_paint = time.perf_counter()
+        if self.first_paint is None:
+            self.first_paint = self.last_paint
+        self.painted.set()
+
+
+def drive(run: callable, keys: list) -> dict:
+    """Calls run() while typing keys, returning its result and timings.
+
+    Each key is sent once the frame for the previous one is painted, from
+    another thread, so that its latency includes reading and handling the
+    key and rendering the new frame, as the user would experience it.
+    """
+    output = RecordingOutput()
+    latencies = []
+    with ptk_input.create_pipe_input() as pipe_input:
+
+        def type_keys() -> None:
+            output.painted.wait(TIMEOUT)
+            for key in keys:
+                output.painted.clear()
+                start = time.perf_counter()
+                pipe_input.send_text(key)
+                if output.painted.wait(TIMEOUT):
+                    latencies.append(output.last_paint - start)
+
+        typist = threading.Thread(target=type_keys, daemon=True)
+        with ptk_app.create_app_session(input=pipe_input, output=output):
+            typist.start()
+            start = time.perf_counter()
+            result = run()
+            elapsed = time.perf_counter() - start
+        typist.join(TIMEOUT)
+    return {
+        "result": result,
+        "elapsed": elapsed,
+        "first_paint": output.first_paint - start,
+        "latencies": latencies,
+    }
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _create_question(form_type: str, choices: list) -> dict:
+    question = {"Type": form_type, "Name": "answer", "Message": "Question?"}
+    if form_type in SIZED:
+        question["Choices"] = choices
+    return question
+
+
+def bench_form(form_type: str, choices: list, repeat: int) -> dict:
+    """Runs a form repeat times, returning the median timings."""
+    question = _create_question(form_type, choices)
+    form_class = reptile.FORMS_MAP[question.pop("Type")]
+    constructions, first_paints, latencies = [], [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        form = form_class(**question)
+        constructions.append(time.perf_counter() - start)
+        run = drive(lambda: form.ask_question({}), SCRIPTS[form_type])
+        first_paints.append(run["first_paint"])
+        latencies.extend(run["latencies"])
+    latencies.sort()
+    tracemalloc.start()
+    form = form_class(**question)
+    drive(lambda: form.ask_question({}), SCRIPTS[form_type])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "form": form_type,
+        "choices": len(choices) if form_type in SIZED else None,
+        "construct_ms": _ms(statistics.median(constructions)),
+        "first_paint_ms": _ms(statistics.median(first_paints)),
+        "keystroke_median_ms": _ms(statistics.median(latencies)),
+        "keystroke_p95_ms": _ms(latencies[int(len(latencies) * 0.95)]),
+        "keystroke_max_ms": _ms(latencies[-1]),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def bench_prompt(choices: list, single_app: bool, repeat: int) -> dict:
+    """Runs a full questionnaire through reptile.prompt()."""
+    questions = []
+    keys = []
+    for form_type in ["List", "Checkbox", "Input", "Confirm"]:
+        question = _create_question(form_type, choices)
+        question["Name"] = form_type
+        questions.append(question)
+        keys.extend(SCRIPTS[form_type])
+    timings = []
+    for _ in range(repeat):
+        run = drive(lambda: reptile.prompt(questions, single_app), keys)
+        timings.append(run["elapsed"])
+    return {
+        "single_app": single_app,
+        "choices": len(choices),
+        "keys": len(keys),
+        "total_ms": _ms(statistics.median(timings)),
+    }
+
+
+def _get_commit() -> str:
+    """Returns the commit being benchmarked, if in a git repository."""
+    try:
+        output = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode().strip()
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Returns the timings that got slower than tolerance times baseline.
+
+    Differences under a millisecond are ignored, as they're mostly noise.
+    """
+    regressions = []
+    for section in ["forms", "prompt"]:
+        old_rows = {
+            (row.get("form"), row.get("single_app"), row["choices"]): row
+            for row in baseline.get(section, [])
+        }
+        for row in results[section]:
+            key = (row.get("form"), row.get("single_app"), row["choices"])
+            old = old_rows.get(key)
+            if old is None:
+                continue
+            for metric, value in row.items():
+                if metric not in COMPARED or metric not in old:
+                    continue
+                limit = old[metric] * tolerance
+                if value > limit and value - old[metric] > 1:
+                    regressions.append(
+                        {
+                            "section": section,
+                            "key": list(key),
+                            "metric": metric,
+                            "baseline": old[metric],
+                            "value": value,
+                        }
+                    )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--import-samples", type=int, default=10)
+    parser.add_argument("--prompt-choices", type=int, default=1000)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    args = parser.parse_args()
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+    #  By default a thread waits up to 5ms for the GIL, which would be
+    #  measured as latency by the thread typing the keys.
+    sys.setswitchinterval(1e-4)
+    import_timings = bench_import.measure("reptile", args.import_samples)
+    results = {
+        "meta": {
+            "commit": _get_commit(),
+            "python": platform.python_version(),
+            "prompt_toolkit": prompt_toolkit.__version__,
+            "platform": platform.platform(),
+        },
+        "import_ms": round(statistics.median(import_timings), 2),
+        "forms": [],
+        "prompt": [],
+    }
+    #  The first run of each form imports modules and builds shared
+    #  objects (e.g. the default style), which isn't measured.
+    for form_type in SCRIPTS:
+        bench_form(form_type, ["Choice"], repeat=1)
+    for form_type in SCRIPTS:
+        sizes = args.sizes if form_type in SIZED else [0]
+        for size in sizes:
+            choices = ["Choice {}".format(idx) for idx in range(size)]
+            results["forms"].append(bench_form(form_type, choices, args.repeat))
+    choices = ["Choice {}".format(idx) for idx in range(args.prompt_choices)]
+    for single_app in [False, True]:
+        results["prompt"].append(bench_prompt(choices, single_app, args.repeat))
+    if baseline is not None:
+        results["regressions"] = compare(results, baseline, args.tolerance)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+    return int(bool(results.get("regressions")))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Benchmark for the time it takes to import reptile.
+
+Each sample imports reptile in a fresh interpreter and measures the import
+alone (the interpreter's own startup is excluded). The results are printed
+as JSON; with --max-ms the script fails if the median exceeds the limit,
+so it can guard the import time in CI.
+
+    python tests/benchmarks/bench_import.py --samples 20 --max-ms 50
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+CODE = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def measure(module: str, samples: int) -> list:
+    """Returns the import times of a module, in milliseconds."""
+    timings = []
+    for _ in range(samples):
+        output = subprocess.check_output(
+            [sys.executable, "-c", CODE.format(module=module)]
+        )
+        timings.append(float(output) * 1000)
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+    results = {}
+    #  prompt_toolkit is measured as a reference: importing reptile should
+    #  cost a small fraction of it.
+    for module in ["reptile", "prompt_toolkit"]:
+        timings = measure(module, args.samples)
+        results[module] = {
+            "median_ms": round(statistics.median(timings), 2),
+            "min_ms": round(min(timings), 2),
+            "max_ms": round(max(timings), 2),
+        }
+    print(json.dumps(results, indent=2))
+    if args.max_ms is not None:
+        return int(results["reptile"]["median_ms"] > args.max_ms)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
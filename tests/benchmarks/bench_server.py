@@ -0,0 +1,143 @@
+"""Load test for serving questionnaires over telnet.
+
+It starts a QuestionnaireServer and connects many simulated clients over
+local sockets, in the same process. First all the clients connect and
+stay idle on the first question, to measure the memory taken by each
+session and the number of file descriptors; then they all answer at once,
+to measure how long each one waits for the server. The memory is the
+growth of the resident set, so it includes the (small) memory of the
+simulated clients. The results are printed as JSON.
+
+    python tests/benchmarks/bench_server.py --sessions 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+
+from reptile.server import QuestionnaireServer
+
+QUESTIONS = [
+    {
+        "Type": "List",
+        "Name": "Team",
+        "Message": "Which team are you in?",
+        "Choices": ["Platform", "Data", "Security", "Support"],
+    },
+    {"Type": "Input", "Name": "Name", "Message": "What's your name?"},
+    {"Type": "Confirm", "Name": "Agree", "Message": "Do you agree?"},
+]
+KEYS = "\x1b[B\rOperator\ry"
+#  Number of clients connecting at the same time, below the backlog of
+#  the server (see reptile.server.BACKLOG).
+CONCURRENT_CONNECTIONS = 64
+#  IAC SB TTYPE IS xterm IAC SE: the server waits for the terminal type.
+TTYPE = b"\xff\xfa\x18\x00xterm\xff\xf0"
+
+
+def _count_fds() -> int:
+    """Returns the number of file descriptors open by the process."""
+    return len(os.listdir("/proc/self/fd"))
+
+
+def _get_rss() -> int:
+    """Returns the resident set size of the process, in bytes."""
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class Client:
+    """A simulated user, connecting and then answering on demand."""
+
+    def __init__(self, port: int) -> None:
+        self._port = port
+        self._reader = None
+        self._writer = None
+
+    async def connect(self, limit: asyncio.Semaphore) -> None:
+        """Connects and waits for the first question to be displayed."""
+        async with limit:
+            self._reader, self._writer = await asyncio.open_connection(
+                "127.0.0.1", self._port
+            )
+            self._writer.write(TTYPE)
+            await self._reader.readuntil(b"[?]")
+
+    async def answer(self) -> float:
+        """Answers all the questions, returning the seconds it took."""
+        start = time.perf_counter()
+        self._writer.write(KEYS.encode())
+        await self._reader.read()
+        self._writer.close()
+        return time.perf_counter() - start
+
+
+async def bench(sessions: int, single_app: bool) -> dict:
+    received = []
+    server = QuestionnaireServer(
+        QUESTIONS,
+        lambda answers, connection: received.append(answers),
+        port=0,
+        single_app=single_app,
+        enable_cpr=False,
+    )
+    ready = asyncio.Event()
+    serving = asyncio.ensure_future(server.run(ready_cb=ready.set))
+    await ready.wait()
+    #  A first session, so that the modules imported and the objects
+    #  built once don't count as the sessions' memory.
+    limit = asyncio.Semaphore(CONCURRENT_CONNECTIONS)
+    warm_up = Client(server.port)
+    await warm_up.connect(limit)
+    await warm_up.answer()
+    fds = _count_fds()
+    rss = _get_rss()
+    start = time.perf_counter()
+    clients = [Client(server.port) for _ in range(sessions)]
+    await asyncio.gather(*(client.connect(limit) for client in clients))
+    connect_seconds = time.perf_counter() - start
+    idle_bytes = _get_rss() - rss
+    idle_fds = _count_fds() - fds
+    start = time.perf_counter()
+    timings = await asyncio.gather(*(client.answer() for client in clients))
+    answer_seconds = time.perf_counter() - start
+    serving.cancel()
+    timings = sorted(timing * 1000 for timing in timings)
+    return {
+        "sessions": sessions,
+        "single_app": single_app,
+        "answered": len(received) - 1,
+        "connect_s": round(connect_seconds, 3),
+        "idle_kb_per_session": round(idle_bytes / sessions / 1024, 1),
+        "fds_per_session": round(idle_fds / sessions, 2),
+        "answer_s": round(answer_seconds, 3),
+        "answered_per_s": round(sessions / answer_seconds, 1),
+        "answer_median_ms": round(statistics.median(timings), 1),
+        "answer_p95_ms": round(timings[int(len(timings) * 0.95)], 1),
+        "answer_max_ms": round(timings[-1], 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--per-question-app", action="store_true")
+    args = parser.parse_args()
+    #  Each session takes three file descriptors (see QuestionnaireServer)
+    #  plus the client's socket.
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed = args.sessions * 4 + 64
+    if soft < needed and (hard == resource.RLIM_INFINITY or hard >= needed):
+        resource.setrlimit(resource.RLIMIT_NOFILE, (needed, hard))
+    results = asyncio.run(bench(args.sessions, not args.per_question_app))
+    print(json.dumps(results, indent=2))
+    return int(results["answered"] != args.sessions)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
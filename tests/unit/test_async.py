@@ -0,0 +1,47 @@
+import asyncio
+import unittest.mock as mock
+
+import reptile
+
+
+async def double(x):
+    await asyncio.sleep(0)
+    return x * 2
+
+
+async def never(answers):
+    await asyncio.sleep(0)
+    return False
+
+
+@mock.patch("prompt_toolkit.PromptSession")
+def test_prompt_async_awaits_coroutines(mock_session):
+    mock_session.return_value.prompt_async = mock.AsyncMock(return_value=21)
+    questions = [
+        {
+            "Type": "Input",
+            "Name": "A",
+            "Message": "What's the answer?",
+            "Transform": double,
+        },
+        {
+            "Type": "Input",
+            "Name": "B",
+            "Message": "What's the answer?",
+            "When": never,
+        },
+    ]
+    answers = asyncio.run(reptile.prompt_async(questions))
+    assert answers == {"A": 42}
+
+
+@mock.patch("prompt_toolkit.prompt", return_value=21)
+def test_prompt_runs_coroutines(mock_prompt):
+    question = {
+        "Type": "Input",
+        "Name": "A",
+        "Message": "What's the answer?",
+        "Transform": double,
+    }
+    answers = reptile.prompt(question)
+    assert answers["A"] == 42
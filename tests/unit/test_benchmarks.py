@@ -0,0 +1,38 @@
+import json
+import os
+import pathlib
+import subprocess
+import sys
+
+ROOT = pathlib.Path(__file__).parents[2]
+
+
+def _run_benchmark(script: str, *args: str) -> dict:
+    """Runs a benchmark script and returns the JSON it prints."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    completed = subprocess.run(
+        [sys.executable, str(ROOT / "tests" / "benchmarks" / script), *args],
+        check=True,
+        stdout=subprocess.PIPE,
+        env=env,
+        timeout=120,
+    )
+    return json.loads(completed.stdout)
+
+
+def test_forms_benchmark_runs(tmp_path):
+    args = ["--sizes", "10", "--repeat", "1", "--import-samples", "1"]
+    args += ["--prompt-choices", "10", "--output", str(tmp_path / "a.json")]
+    results = _run_benchmark("bench_forms.py", *args)
+    assert [row["form"] for row in results["forms"]] == [
+        "List",
+        "Checkbox",
+        "Input",
+        "Confirm",
+    ]
+    assert all(row["keystroke_median_ms"] > 0 for row in results["forms"])
+    assert [row["single_app"] for row in results["prompt"]] == [False, True]
+    # The same results can't be a regression of themselves.
+    args[-1] = str(tmp_path / "b.json")
+    args += ["--baseline", str(tmp_path / "a.json"), "--tolerance", "1000"]
+    assert _run_benchmark("bench_forms.py", *args)["regressions"] == []
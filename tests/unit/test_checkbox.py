@@ -19,3 +19,76 @@ def test_default_is_returned(mock_app):
     answers = {}
     form.ask_question(answers)
     assert answers["A"] == "42"
+
+
+def test_only_visible_choices_are_rendered():
+    question = {
+        "Type": "Checkbox",
+        "Name": "A",
+        "Message": "What's the answer?",
+        "Choices": [str(i) for i in range(50000)],
+        "PageSize": 5,
+    }
+    form = reptile.FORMS_MAP[question["Type"]](**question)
+    form._move_cursor_to(100)
+    text = "".join(t for _, t in form._get_choices_fragments())
+    assert text.splitlines()[1:5] == [
+        "  ○ 97",
+        "  ○ 98",
+        "  ○ 99",
+        "❯ ○ 100",
+    ]
+    assert "↑ 96 more ↓ 49899 more" in text
+    assert form._get_choices_height() == 6
+
+
+def test_selection_survives_filtering():
+    question = {
+        "Type": "Checkbox",
+        "Name": "A",
+        "Message": "What's the answer?",
+        "Choices": ["alpha", "beta", "gamma", "delta"],
+    }
+    form = reptile.FORMS_MAP[question["Type"]](**question)
+    form._selected.add(0)
+    form._filtering = True
+    form._set_query("ta")
+    assert form._get_cursor_choice() == 1
+    form._stop_filtering()
+    assert list(form._get_selected_indices()) == [0]
+    assert form._idx_cursor == 1
+
+
+def test_rows_are_built_once_per_state():
+    question = {
+        "Type": "Checkbox",
+        "Name": "A",
+        "Message": "What's the answer?",
+        "Choices": ["A", "B", "C"],
+    }
+    form = reptile.FORMS_MAP[question["Type"]](**question)
+    row = form._get_choice_fragments(1, False)
+    assert form._get_choice_fragments(1, False) is row
+    form._selected.add(1)
+    selected_row = form._get_choice_fragments(1, False)
+    assert selected_row is not row
+    assert selected_row[1] == ("class:selector", "● ")
+    form._selected.discard(1)
+    assert form._get_choice_fragments(1, False) is row
+
+
+def test_range_selection():
+    question = {
+        "Type": "Checkbox",
+        "Name": "A",
+        "Message": "What's the answer?",
+        "Choices": ["A", "B", "C", "D", "E"],
+    }
+    form = reptile.FORMS_MAP[question["Type"]](**question)
+    form._move_cursor_to(1)
+    form._select_range(1)
+    form._select_range(1)
+    assert list(form._get_selected_indices()) == [1, 2, 3]
+    assert form._idx_cursor == 3
+    form._selected.invert()
+    assert form._get_result_text(None) == "A, E"
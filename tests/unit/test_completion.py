@@ -0,0 +1,47 @@
+import threading
+
+import prompt_toolkit.application as ptk_app
+import prompt_toolkit.input as ptk_input
+import prompt_toolkit.output as ptk_output
+
+import reptile
+from reptile.forms.completion import VocabularyIndex
+
+WORDS = ["numpy", "NumExpr", "numba", "pandas", "numpydoc", "numpy"]
+
+
+def test_index_completes_prefixes():
+    index = VocabularyIndex(WORDS)
+    assert len(index) == 5
+    # Shorter words first, case-insensitive.
+    assert index.complete("num") == ["numba", "numpy", "NumExpr", "numpydoc"]
+    assert index.complete("NUMP") == ["numpy", "numpydoc"]
+    assert index.complete("numpyx") == []
+    assert index.complete("p", limit=1) == ["pandas"]
+
+
+def test_index_from_file(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_text("\n".join(WORDS) + "\n\n")
+    index = VocabularyIndex.from_file(path)
+    assert index.complete("pa") == ["pandas"]
+    assert index.memory_size() < 500
+
+
+def test_input_form_completes_words():
+    question = {
+        "Type": "Input",
+        "Name": "A",
+        "Message": "Which package?",
+        "Vocabulary": WORDS,
+    }
+    with ptk_input.create_pipe_input() as pipe_input:
+        # The completions are computed in a worker thread while typing:
+        # <tab> selects the first one once they're available.
+        pipe_input.send_text("pan")
+        threading.Timer(0.3, pipe_input.send_text, ["\t"]).start()
+        threading.Timer(0.6, pipe_input.send_text, ["\r"]).start()
+        with ptk_app.create_app_session(
+            input=pipe_input, output=ptk_output.DummyOutput()
+        ):
+            assert reptile.prompt(question) == {"A": "pandas"}
@@ -0,0 +1,138 @@
+import io
+
+import prompt_toolkit.application as ptk_app
+import prompt_toolkit.input as ptk_input
+import prompt_toolkit.output as ptk_output
+import pytest
+
+import reptile
+from reptile import events, profiling
+
+QUESTIONS = [
+    {
+        "Type": "List",
+        "Name": "A",
+        "Message": "What's the answer?",
+        "Choices": ["41", "42", "43"],
+    },
+    {
+        "Type": "Input",
+        "Name": "B",
+        "Message": "What's the answer?",
+        "Validate": lambda x: x == "42",
+        "When": lambda answers: answers["A"] == "42",
+    },
+    {
+        "Type": "Confirm",
+        "Name": "C",
+        "Message": "Is that so?",
+        "When": lambda answers: answers["B"] == "41",
+    },
+]
+# The lifecycle of each form, without the renders and the keys.
+LIFECYCLE = [
+    ("prompt_started", None),
+    ("form_built", "A"),
+    ("form_built", "B"),
+    ("form_built", "C"),
+    ("form_opened", "A"),
+    ("first_render", "A"),
+    ("form_closed", "A"),
+    ("answer_committed", "A"),
+    ("form_opened", "B"),
+    ("first_render", "B"),
+    ("validation_started", "B"),
+    ("validation_ended", "B"),
+    ("form_closed", "B"),
+    ("answer_committed", "B"),
+    ("form_opened", "C"),
+    ("form_skipped", "C"),
+    ("prompt_ended", None),
+]
+
+
+def _prompt(questions, keys, **kwargs):
+    """Prompts, typing the keys for each question once it's displayed."""
+    with ptk_input.create_pipe_input() as pipe_input:
+
+        def type_keys(event):
+            if event.name == events.FIRST_RENDER:
+                pipe_input.send_text(keys[event.form])
+
+        events.add_hook(type_keys)
+        try:
+            with ptk_app.create_app_session(
+                input=pipe_input, output=ptk_output.DummyOutput()
+            ):
+                return reptile.prompt(questions, **kwargs)
+        finally:
+            events.remove_hook(type_keys)
+
+
+@pytest.fixture
+def recorded():
+    recorded = events.add_hook([].append).__self__
+    yield recorded
+    events.remove_hook(recorded.append)
+
+
+@pytest.mark.parametrize("single_app", [False, True])
+def test_events_follow_the_forms_lifecycle(recorded, single_app):
+    keys = {"A": "\x1b[B\r", "B": "42\r"}
+    answers = _prompt(QUESTIONS, keys, single_app=single_app)
+    assert answers == {"A": "42", "B": "42"}
+    lifecycle = [
+        (event.name, event.form)
+        for event in recorded
+        if event.name not in (events.RENDERED, events.KEY_HANDLED)
+    ]
+    assert lifecycle == LIFECYCLE
+    handled = [e for e in recorded if e.name == events.KEY_HANDLED]
+    assert [event.form for event in handled] == ["A"] * 2 + ["B"] * 3
+    times = [event.time for event in recorded]
+    assert times == sorted(times)
+    assert all(event.data["duration"] >= 0 for event in handled)
+
+
+def test_applications_are_not_watched_without_hooks():
+    assert not events.enabled()
+    with ptk_input.create_pipe_input() as pipe_input:
+        pipe_input.send_text("\r")
+        with ptk_app.create_app_session(
+            input=pipe_input, output=ptk_output.DummyOutput()
+        ):
+            form = reptile.FORMS_MAP["List"](**QUESTIONS[0])
+            form.ask_question({})
+    # No ApplicationWatcher was created, so there's nothing to emit to.
+    assert not events.enabled()
+
+
+def test_profiler_summarises_each_question():
+    stream = io.StringIO()
+    with profiling.Profiler(stream=stream) as profiler:
+        _prompt(QUESTIONS, {"A": "\x1b[B\r", "B": "42\r"})
+    summary = profiler.summarise()
+    assert list(summary) == ["A", "B", "C"]
+    assert summary["A"]["keys"] == 2
+    assert summary["B"]["validations"] == 1
+    assert summary["A"]["first_render_ms"] > 0
+    assert summary["C"]["first_render_ms"] is None
+    assert not events.enabled()
+    output = stream.getvalue()
+    assert output.startswith("Reptile profile (times in ms)\nquestion")
+    assert len(output.splitlines()) == 5
+
+
+def test_profiling_from_environment(tmp_path):
+    assert profiling.from_environment({}).__class__ is not profiling.Profiler
+    path = str(tmp_path / "stats.prof")
+    profiler = profiling.from_environment(
+        {"REPTILE_PROFILE": "cprofile:" + path}
+    )
+    profiler._stream = io.StringIO()
+    with profiler:
+        _prompt(QUESTIONS[0], {"A": "\r"})
+    assert (tmp_path / "stats.prof").exists()
+    with pytest.warns(UserWarning):
+        profiler = profiling.from_environment({"REPTILE_PROFILE": "what"})
+    assert profiler._mode == "summary"
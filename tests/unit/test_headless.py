@@ -0,0 +1,69 @@
+import unittest.mock as mock
+
+import prompt_toolkit.application as ptk_app
+import pytest
+
+import reptile
+from reptile import headless
+from reptile.errors import InvalidAnswer, MissingAnswer
+
+QUESTIONS = [
+    {
+        "Type": "List",
+        "Name": "A",
+        "Message": "What's the answer?",
+        "Choices": ["41", "42", "43"],
+        "Values": [41, 42, 43],
+    },
+    {
+        "Type": "Checkbox",
+        "Name": "B",
+        "Message": "What's the answer?",
+        "Choices": ["41", "42", "43"],
+        "Validate": lambda x: len(x) == 1 or "Select one answer.",
+    },
+    {
+        "Type": "Confirm",
+        "Name": "C",
+        "Message": "Is that so?",
+    },
+    {
+        "Type": "Input",
+        "Name": "D",
+        "Message": "What's the answer?",
+        "Default": "42",
+        "Transform": int,
+    },
+]
+
+
+@mock.patch.object(ptk_app, "Application", side_effect=AssertionError)
+@mock.patch("prompt_toolkit.prompt", side_effect=AssertionError)
+def test_preset_answers_are_used(mock_prompt, mock_app):
+    preset = {"A": "42", "B": ["42"], "C": "y"}
+    answers = reptile.prompt(QUESTIONS, preset=preset)
+    assert answers == {"A": 42, "B": ["42"], "C": True, "D": 42}
+
+
+def test_invalid_preset_answers_raise():
+    with pytest.raises(InvalidAnswer):
+        reptile.prompt(QUESTIONS, preset={"A": "44"})
+    with pytest.raises(InvalidAnswer):
+        reptile.prompt(QUESTIONS, preset={"B": "41, 42"})
+    with pytest.raises(MissingAnswer):
+        reptile.prompt(QUESTIONS, preset={"A": "42"}, strict=True)
+
+
+def test_environment_answers():
+    environ = {"REPTILE_A": "43", "REPTILE_B": '["41"]', "REPTILE_C": "n"}
+    preset = headless.EnvironmentAnswers(environ=environ)
+    answers = reptile.prompt(QUESTIONS, preset=preset)
+    assert answers == {"A": 43, "B": ["41"], "C": False, "D": 42}
+
+
+def test_prompt_many_reports_errors():
+    records = [{"B": ["41"], "D": "1"}, {"B": []}, {"B": ["43"], "D": "x"}]
+    results = list(headless.prompt_many(QUESTIONS, records))
+    assert results[0].answers == {"A": 41, "B": ["41"], "C": "", "D": 1}
+    assert isinstance(results[1].error, InvalidAnswer)
+    assert isinstance(results[2].error, ValueError)
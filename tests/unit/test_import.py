@@ -0,0 +1,71 @@
+import subprocess
+import sys
+
+import reptile
+from reptile import reptile as reptile_module
+
+
+def _run(code: str) -> str:
+    """Runs some code in a fresh interpreter and returns its output."""
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    return completed.stdout.strip()
+
+
+def test_import_is_lightweight():
+    code = (
+        "import sys, reptile\n"
+        "heavy = ('prompt_toolkit', 'pygments', 'reptile.forms')\n"
+        "print(sorted(m for m in sys.modules if m.startswith(heavy)))\n"
+    )
+    assert _run(code) == "[]"
+
+
+def test_forms_map_is_lazy():
+    code = (
+        "import sys, reptile\n"
+        "reptile.FORMS_MAP['List']\n"
+        "print('reptile.forms.list' in sys.modules,"
+        " 'reptile.forms.checkbox' in sys.modules)\n"
+    )
+    assert _run(code) == "True False"
+
+
+def test_forms_map():
+    from reptile.forms import CheckboxForm, ListForm
+
+    assert reptile.FORMS_MAP["List"] is ListForm
+    assert reptile.FORMS_MAP["Checkbox"] is CheckboxForm
+    assert sorted(reptile.FORMS_MAP) == reptile_module.ACCEPTED_TYPES
+
+
+def test_default_style_is_built_once():
+    style = reptile_module.DEFAULT_STYLE
+    assert style is reptile_module.get_default_style()
+    assert ("pointer", "#FF9D00 bold") in style.style_rules
+
+
+def test_forms_share_the_default_style():
+    question = {"Type": "List", "Name": "A", "Message": "?", "Choices": ["A"]}
+    form = reptile.FORMS_MAP["List"](**question)
+    other = reptile.FORMS_MAP["List"](**question)
+    assert form._style is other._style is reptile_module.get_default_style()
+    assert "Style" not in question
+
+
+def test_forms_do_not_need_pygments():
+    code = (
+        "import sys\n"
+        "sys.modules['pygments'] = None\n"
+        "import reptile\n"
+        "form = reptile.FORMS_MAP['Checkbox'](Name='A', Choices=['x'])\n"
+        "print(form._get_choices_fragments())\n"
+    )
+    assert _run(code) == (
+        "[('class:pointer', '❯ '), ('class:selector', '○ '),"
+        " ('class:text', 'x')]"
+    )
@@ -1,7 +1,5 @@
 import unittest.mock as mock
 
-import prompt_toolkit.formatted_text as ptk_formatted_text
-
 import reptile
 from reptile.forms.input import InputValidator
 
@@ -30,16 +28,17 @@ def test_default_is_returned_when_int(mock_prompt):
     assert answers["A"] == 42
 
 
-def test_format_message_returns_pygments_tokens():
+def test_format_message_returns_fragments():
     question = {
         "Type": "Input",
         "Name": "A",
         "Message": "What's the answer?",
     }
     form = reptile.FORMS_MAP[question["Type"]](**question)
-    assert isinstance(
-        form._format_message(), ptk_formatted_text.PygmentsTokens
-    )
+    assert form._format_message() == [
+        ("class:question-mark", "[?] "),
+        ("class:question", "What's the answer? "),
+    ]
 
 
 @mock.patch("prompt_toolkit.prompt", return_value=21)
@@ -0,0 +1,59 @@
+import concurrent.futures
+import copy
+
+import pytest
+
+import reptile
+from reptile.errors import NotUniqueNames
+
+QUESTIONS = [
+    {
+        "Type": "List",
+        "Name": "A",
+        "Message": "What's the answer?",
+        "Choices": ["41", "42", "43"],
+        "Values": [41, 42, 43],
+    },
+    {
+        "Type": "Checkbox",
+        "Name": "B",
+        "Message": "What's the answer?",
+        "Choices": ["41", "42", "43"],
+    },
+]
+
+
+def test_questions_are_validated_once():
+    with pytest.raises(NotUniqueNames):
+        reptile.compile([QUESTIONS[0], QUESTIONS[0]])
+
+
+def test_questions_are_copied():
+    questions = copy.deepcopy(QUESTIONS)
+    questionnaire = reptile.compile(questions)
+    assert questions == QUESTIONS
+    questions[0]["Choices"].append("44")
+    questions[1]["Name"] = "C"
+    answers = questionnaire.run(preset={"A": "43", "B": ["42"]})
+    assert answers == {"A": 43, "B": ["42"]}
+
+
+def test_forms_share_static_parts():
+    questionnaire = reptile.compile(QUESTIONS)
+    first, _ = questionnaire.create_forms()
+    second, _ = questionnaire.create_forms()
+    assert first is not second
+    assert first._get_choice_fragments(0, True) is (
+        second._get_choice_fragments(0, True)
+    )
+
+
+def test_runs_from_many_threads():
+    questionnaire = reptile.compile(QUESTIONS)
+    presets = [{"A": str(41 + i % 3), "B": "41, 43"} for i in range(300)]
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        results = list(
+            executor.map(lambda p: questionnaire.run(preset=p), presets)
+        )
+    for idx, answers in enumerate(results):
+        assert answers == {"A": 41 + idx % 3, "B": ["41", "43"]}
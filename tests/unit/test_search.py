@@ -0,0 +1,20 @@
+from reptile.forms.search import ChoicesIndex
+
+
+def test_results_are_ranked():
+    choices = ["Casablanca", "Blade Runner", "Barbarella", "Fight Club"]
+    index = ChoicesIndex(choices)
+    # Prefix matches come first, then substrings, then fuzzy matches.
+    assert index.search("b") == [1, 2, 0, 3]
+    assert index.search("bla") == [1, 0, 2]
+    assert index.search("BR") == [1, 2]
+
+
+def test_search_refines_previous_results():
+    choices = ["alpha", "beta", "gamma", "delta"]
+    index = ChoicesIndex(choices)
+    assert index.search("ta") == [1, 3]
+    assert index.search("tal") == []
+    # Going back to a previous query reuses the stored results.
+    assert index.search("ta") == [1, 3]
+    assert index.search("") == [0, 1, 2, 3]
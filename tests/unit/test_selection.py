@@ -0,0 +1,37 @@
+from reptile.forms.selection import Selection
+
+
+def test_add_and_discard():
+    selection = Selection()
+    selection.add(3)
+    selection.add(17)
+    selection.add(3)
+    assert 3 in selection and 17 in selection and 4 not in selection
+    selection.discard(3)
+    selection.discard(5)
+    assert list(selection.indices(20)) == [17]
+    assert selection.count(20) == 1
+
+
+def test_select_all_and_invert():
+    selection = Selection()
+    selection.add(1)
+    selection.invert()
+    assert list(selection.indices(5)) == [0, 2, 3, 4]
+    assert selection.count(5) == 4
+    selection.select_all()
+    assert selection.is_all()
+    assert list(selection.indices(5)) == [0, 1, 2, 3, 4]
+    selection.toggle(2)
+    assert not selection.is_all()
+    assert list(selection.indices(5)) == [0, 1, 3, 4]
+    selection.clear()
+    assert list(selection.indices(5)) == []
+
+
+def test_indices_are_bounded_by_size():
+    selection = Selection()
+    selection.select_all()
+    assert list(selection.indices(0)) == []
+    assert list(selection.indices(10)) == list(range(10))
+    assert sum(1 for _ in selection.indices(300001)) == 300001
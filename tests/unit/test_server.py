@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from reptile.server import QuestionnaireServer
+
+QUESTIONS = [
+    {
+        "Type": "List",
+        "Name": "A",
+        "Message": "What's the answer?",
+        "Choices": ["41", "42", "43"],
+    },
+    {"Type": "Input", "Name": "B", "Message": "What's your name?"},
+]
+# IAC SB TTYPE IS xterm IAC SE: the server waits for the terminal type.
+TTYPE = b"\xff\xfa\x18\x00xterm\xff\xf0"
+
+
+async def _answer(port, keys):
+    """Connects to the server, types the keys and waits to be disconnected."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(TTYPE)
+    await reader.readuntil(b"[?]")
+    writer.write(keys.encode())
+    await reader.read()
+    writer.close()
+
+
+@pytest.mark.parametrize("single_app", [False, True])
+def test_server_asks_each_connection(single_app):
+    received = []
+
+    async def on_answers(answers, connection):
+        received.append(answers)
+
+    async def main():
+        server = QuestionnaireServer(
+            QUESTIONS,
+            on_answers,
+            port=0,
+            single_app=single_app,
+            enable_cpr=False,
+        )
+        ready = asyncio.Event()
+        serving = asyncio.ensure_future(server.run(ready_cb=ready.set))
+        await ready.wait()
+        clients = [
+            _answer(server.port, "\x1b[B" * idx + "\r" + name + "\r")
+            for idx, name in enumerate(["Ann", "Bob", "Cy"])
+        ]
+        await asyncio.wait_for(asyncio.gather(*clients), timeout=10)
+        assert server.sessions == 0
+        serving.cancel()
+
+    asyncio.run(main())
+    assert sorted(received, key=lambda answers: answers["B"]) == [
+        {"A": "41", "B": "Ann"},
+        {"A": "42", "B": "Bob"},
+        {"A": "43", "B": "Cy"},
+    ]
@@ -0,0 +1,43 @@
+import prompt_toolkit.application as ptk_app
+import prompt_toolkit.input as ptk_input
+import prompt_toolkit.output as ptk_output
+
+import reptile
+
+
+def test_single_app_asks_all_questions():
+    questions = [
+        {
+            "Type": "List",
+            "Name": "A",
+            "Message": "What's the answer?",
+            "Choices": ["41", "42", "43"],
+        },
+        {
+            "Type": "Input",
+            "Name": "B",
+            "Message": "What's the answer?",
+            "Validate": lambda x: x == "42",
+        },
+        {
+            "Type": "Confirm",
+            "Name": "C",
+            "Message": "Is that so?",
+            "When": lambda answers: answers["B"] == "42",
+        },
+        {
+            "Type": "Checkbox",
+            "Name": "D",
+            "Message": "What's the answer?",
+            "Choices": ["41", "42", "43"],
+        },
+    ]
+    # Keys are typed ahead: each form must receive its own keys only.
+    keys = "\x1b[B\r41\r\x7f2\ry\x1b[B \r"
+    with ptk_input.create_pipe_input() as pipe_input:
+        pipe_input.send_text(keys)
+        with ptk_app.create_app_session(
+            input=pipe_input, output=ptk_output.DummyOutput()
+        ):
+            answers = reptile.prompt(questions, single_app=True)
+    assert answers == {"A": "42", "B": "42", "C": True, "D": ["42"]}
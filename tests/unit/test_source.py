@@ -0,0 +1,32 @@
+import asyncio
+
+import reptile
+from reptile.forms.source import LazyChoices
+
+
+def test_iterators_are_wrapped():
+    question = {
+        "Type": "List",
+        "Name": "A",
+        "Message": "What's the answer?",
+        "Choices": (str(i) for i in range(100)),
+    }
+    form = reptile.FORMS_MAP[question["Type"]](**question)
+    assert isinstance(form._choices, LazyChoices)
+    # Nothing is pulled from the source until the form is displayed.
+    assert len(form._choices) == 0
+    assert form._get_choices_height() == 1
+
+
+def test_async_iterators_are_loaded():
+    async def source():
+        for i in range(3):
+            await asyncio.sleep(0)
+            yield str(i)
+
+    updates = []
+    choices = LazyChoices(source())
+    asyncio.run(choices.load(lambda: updates.append(len(choices))))
+    assert list(choices) == ["0", "1", "2"]
+    assert choices.exhausted
+    assert updates[-1] == 3
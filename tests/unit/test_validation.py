@@ -0,0 +1,115 @@
+import threading
+import time
+
+import prompt_toolkit.application as ptk_app
+import prompt_toolkit.document as ptk_document
+import prompt_toolkit.input as ptk_input
+import prompt_toolkit.output as ptk_output
+import prompt_toolkit.validation as ptk_validation
+import pytest
+
+import reptile
+from reptile.forms.input import InputValidator
+from reptile.forms.validation import ResultsCache
+
+
+def test_results_cache_evicts_least_recently_used():
+    cache = ResultsCache(size=2)
+    cache.put("a", "")
+    cache.put("b", "Invalid.")
+    cache.get("a")
+    cache.put("c", "")
+    assert cache.get("a") == ""
+    assert cache.get("b") is None
+
+
+def test_valid_texts_are_validated_once():
+    calls = []
+
+    def validate(text):
+        calls.append(text)
+        return text == "42"
+
+    validator = InputValidator(validate)
+    for text in ["42", "42", "41", "41"]:
+        try:
+            validator.validate(ptk_document.Document(text))
+        except ptk_validation.ValidationError:
+            pass
+    # Failures are checked again, in case something changed meanwhile.
+    assert calls == ["42", "41", "41"]
+
+
+def _run(question, keys):
+    """Asks a question, typing each (text, pause) from another thread."""
+    with ptk_input.create_pipe_input() as pipe_input:
+
+        def type_keys():
+            for text, pause in keys:
+                pipe_input.send_text(text)
+                time.sleep(pause)
+
+        threading.Thread(target=type_keys, daemon=True).start()
+        with ptk_app.create_app_session(
+            input=pipe_input, output=ptk_output.DummyOutput()
+        ):
+            return reptile.prompt(question)
+
+
+@pytest.mark.parametrize("in_thread", [False, True])
+def test_validation_while_typing_is_debounced(in_thread):
+    calls = []
+
+    def validate(text):
+        calls.append(text)
+        return text == "42" or "Not the answer."
+
+    question = {
+        "Type": "Input",
+        "Name": "A",
+        "Message": "What's the answer?",
+        "Validate": validate,
+        "ValidateInThread": in_thread,
+        "ValidateWhileTyping": True,
+    }
+    keys = [("4", 0), ("2", 0.4), ("1", 0.4), ("\x7f", 0.05), ("\r", 0)]
+    assert _run(question, keys) == {"A": "42"}
+    # "4" is never validated, nor "42" when it's typed again.
+    assert calls == ["42", "421"]
+
+
+def test_coroutine_validation_while_typing():
+    async def validate(text):
+        return text == "42"
+
+    question = {
+        "Type": "Input",
+        "Name": "A",
+        "Message": "What's the answer?",
+        "Validate": validate,
+        "ValidateWhileTyping": True,
+    }
+    assert _run(question, [("42", 0.3), ("\r", 0)]) == {"A": "42"}
+
+
+def test_checkbox_drops_stale_validation():
+    calls = []
+
+    def validate(selection):
+        calls.append(selection)
+        time.sleep(0.2)
+        return len(selection) == 1
+
+    question = {
+        "Type": "Checkbox",
+        "Name": "A",
+        "Message": "What's the answer?",
+        "Choices": ["41", "42", "43"],
+        "Validate": validate,
+        "ValidateInThread": True,
+    }
+    # The selection changes while the first validation is pending, so its
+    # (successful) result must not submit the form.
+    keys = [(" \r", 0.05), (" ", 0.4), ("\x1b[B\x1b[B \r", 0)]
+    assert _run(question, keys) == {"A": ["43"]}
+    assert calls == [["41"], ["43"]]